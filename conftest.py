@@ -0,0 +1,4 @@
+from __future__ import annotations
+
+# Adds `pytest --answers` to check the answers for the real inputs.
+pytest_plugins = ["year2025.utils._answers"]
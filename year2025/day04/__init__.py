@@ -3,8 +3,6 @@ from __future__ import annotations
 from collections.abc import Sequence
 from dataclasses import dataclass
 
-from pystreamapi import Stream
-
 from .. import utils as u
 
 TEST_INPUT1 = r"""
@@ -43,28 +41,30 @@ class Solution(u.Solution):
         return cls(input=u.DenseGrid.from_str(input))
 
     def removable(self, grid: u.DenseGrid[str]) -> Sequence[u.Coord]:
-        return list(
-            Stream.of(grid.iter_cells())
-            .filter(lambda x: x[1] == "@")
-            .map(lambda x: x[0])
-            .filter(
-                lambda coord: Stream.of(grid.neighbors(coord, u.Deltas2d.ALL))
-                .filter(lambda y: grid[y] == "@")
-                .count()
-                < 4
-            )
-        )
+        counts = grid.neighbor_counts(lambda cell: cell == "@", u.Deltas2d.ALL)
+        return [
+            coord
+            for (coord, cell) in grid.iter_cells()
+            if cell == "@" and counts[coord] < 4
+        ]
 
     def part1(self) -> int:
         return len(self.removable(self.input))
 
     def part2(self) -> int:
-        result = 0
-        input = self.input.copy()
-        while True:
-            to_remove = self.removable(input)
-            if not to_remove:
-                break
-            result += len(to_remove)
-            input.update({coord: "." for coord in to_remove})
-        return result
+        return sum(
+            len(generation.changes)
+            for generation in RemoveAccessible(self.input.copy()).run_generations()
+        )
+
+
+class RemoveAccessible(u.CellularAutomaton[str]):
+    def rule(self, coord: u.Coord, value: str) -> str:
+        if value != "@":
+            return value
+        num_neighbors = u.count(
+            neighbor
+            for neighbor in self.grid.neighbors(coord, self.deltas)
+            if self.grid[neighbor] == "@"
+        )
+        return "." if num_neighbors < 4 else value
@@ -42,7 +42,7 @@ def test_part2() -> None:
 
 
 def next_coords(
-    grid: u.DenseGrid[str], timelines: Counter[u.Coord]
+    grid: u.OverlayGrid[str], timelines: Counter[u.Coord]
 ) -> Iterable[tuple[u.Coord, u.Coord]]:
     for coord in timelines.keys():
         next_coord = coord + u.Deltas2d.DOWN
@@ -59,8 +59,8 @@ def next_coords(
 
 
 def step(
-    grid: u.DenseGrid[str], timelines: Counter[u.Coord]
-) -> tuple[u.DenseGrid[str], Counter[u.Coord]]:
+    grid: u.OverlayGrid[str], timelines: Counter[u.Coord]
+) -> tuple[u.OverlayGrid[str], Counter[u.Coord]]:
     next_grid = grid.copy()
     next_timelines = Counter[u.Coord]()
     for coord, next_coord in next_coords(grid=grid, timelines=timelines):
@@ -77,8 +77,8 @@ class Solution(u.Solution):
     def parse_input(cls, input: str) -> "Solution":
         return cls(input=u.DenseGrid.from_str(input))
 
-    def simulate(self) -> tuple[u.DenseGrid[str], Counter[u.Coord]]:
-        grid = self.input
+    def simulate(self) -> tuple[u.OverlayGrid[str], Counter[u.Coord]]:
+        grid = self.input.overlay()
         timelines = Counter[u.Coord]({grid.find_only_exn("S"): 1})
         while True:
             grid, next_timelines = step(grid=grid, timelines=timelines)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from ._funs import Cycle as Cycle
 from ._funs import InclusiveInterval as InclusiveInterval
 from ._funs import all_different as all_different
 from ._funs import all_same as all_same
 from ._funs import assert_in_bounds as assert_in_bounds
 from ._funs import clamp_int as clamp_int
 from ._funs import count as count
+from ._funs import find_cycle as find_cycle
 from ._funs import flatten as flatten
 from ._funs import floyd_warshall as floyd_warshall
 from ._funs import group_by as group_by
@@ -19,26 +21,37 @@ from ._funs import only as only
 from ._funs import only_exn as only_exn
 from ._funs import product_float as product_float
 from ._funs import product_int as product_int
+from ._funs import run_periodic as run_periodic
 from ._funs import skip as skip
 from ._funs import sliding_windows as sliding_windows
 from ._funs import split_into_groups_of_size_n as split_into_groups_of_size_n
 from ._funs import split_into_n_groups_exn as split_into_n_groups_exn
+from ._funs import state_at as state_at
 from ._funs import subsequences as subsequences
 from ._funs import take as take
 from ._funs import take_while as take_while
 from ._funs import transpose as transpose
 from ._funs import transpose_lines as transpose_lines
 from ._funs import unique_ordered as unique_ordered
+from ._grid import Adjacency as Adjacency
+from ._grid import BitGrid as BitGrid
+from ._grid import CellularAutomaton as CellularAutomaton
+from ._grid import ChunkedSparseGrid as ChunkedSparseGrid
 from ._grid import Coord as Coord
+from ._grid import CoordTable as CoordTable
 from ._grid import Delta as Delta
 from ._grid import Deltas2d as Deltas2d
 from ._grid import Deltas3d as Deltas3d
 from ._grid import DenseGrid as DenseGrid
 from ._grid import FindShortestPath as FindShortestPath
 from ._grid import FloodFill as FloodFill
+from ._grid import Generation as Generation
 from ._grid import GridFloodFill as GridFloodFill
+from ._grid import JumpTable as JumpTable
+from ._grid import OverlayGrid as OverlayGrid
 from ._grid import ShortestPathNode as ShortestPathNode
 from ._grid import SparseGrid as SparseGrid
+from ._grid import ZobristHash as ZobristHash
 from ._grid import first_completed_generator as first_completed_generator
 from ._grid import run_generator as run_generator
 from ._parse import extract_int_list as extract_int_list
@@ -47,4 +60,8 @@ from ._parse import hex_to_dec as hex_to_dec
 from ._parse import split_line_groups as split_line_groups
 from ._parse import split_lines as split_lines
 from ._parse import tuple2 as tuple2
+from ._particles import Particles as Particles
+from ._particles import ParticleStats as ParticleStats
+from ._run import PhaseMeasurement as PhaseMeasurement
 from ._run import Solution as Solution
+from ._run import measure_phase as measure_phase
@@ -0,0 +1,280 @@
+"""Check every solution against the accepted answers for its real input.
+
+The answers are recorded in `answers.toml` at the root of the repository,
+along with a time budget for each day. The checks are collected by pytest
+from that file when it's run with `--answers`, e.g.:
+
+    uv run pytest --answers answers.toml
+
+To (re-)record the manifest, run:
+
+    uv run python -m year2025.utils.run_all --record-answers
+
+This runs every day afresh, without `tracemalloc` or the parse cache, like
+the checks do, and raises the timeout to the largest budget already in the
+manifest so that slow days aren't dropped. Days which fail or time out keep
+their existing entries, so check the output for errors. Each budget is
+`suggest_budget` of the day's total time.
+
+A part can be left out of the manifest by deleting its answer from the
+entry, e.g. if the part isn't solved yet. It then isn't checked, and
+re-recording the manifest leaves it out too.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import math
+import re
+import tomllib
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from ._inputs import InputStore, find_input
+from ._run import JobTimeout, measure_phase, time_limit
+
+ANSWERS_PATH = Path(__file__).resolve().parents[2] / "answers.toml"
+
+_INT_RE = re.compile(r"-?\d+")
+_SECTION_RE = re.compile(r"year(\d+)\.day(\d+)")
+
+
+@dataclass(frozen=True, kw_only=True)
+class ManifestEntry:
+    year: int
+    day: int
+
+    part1: str | None
+    """The accepted answer, or `None` if the part isn't implemented, in which
+    case it isn't checked."""
+
+    part2: str | None
+
+    budget: float
+    """The maximum total wall-clock time in seconds for parsing and running
+    both parts."""
+
+    def section(self) -> str:
+        """
+        >>> ManifestEntry(year=2025, day=1, part1="1", part2="2", budget=1.0).section()
+        'year2025.day01'
+        """
+        return f"year{self.year}.day{self.day:02}"
+
+
+def load_manifest(path: Path = ANSWERS_PATH) -> list[ManifestEntry]:
+    with path.open("rb") as f:
+        return parse_manifest(tomllib.load(f))
+
+
+def parse_manifest(manifest: Mapping[str, object]) -> list[ManifestEntry]:
+    """
+    >>> import tomllib
+    >>> entries = parse_manifest(tomllib.loads('''
+    ... [year2025.day01]
+    ... part1 = 1123
+    ... part2 = "abc"
+    ... budget = 1.5
+    ...
+    ... [year2023.day10]
+    ... part1 = 6820
+    ... budget = 1.0
+    ... '''))
+    >>> entries[0]
+    ManifestEntry(year=2023, day=10, part1='6820', part2=None, budget=1.0)
+    >>> entries[1]
+    ManifestEntry(year=2025, day=1, part1='1123', part2='abc', budget=1.5)
+    """
+    result = []
+    for year_key, days in manifest.items():
+        assert isinstance(days, dict), f"Expected a table for {year_key!r}"
+        for day_key, entry in days.items():
+            match = _SECTION_RE.fullmatch(f"{year_key}.{day_key}")
+            assert match is not None, f"Unexpected section {year_key}.{day_key}"
+            result.append(
+                ManifestEntry(
+                    year=int(match.group(1)),
+                    day=int(match.group(2)),
+                    part1=_optional_str(entry.get("part1")),
+                    part2=_optional_str(entry.get("part2")),
+                    budget=float(entry["budget"]),
+                )
+            )
+    result.sort(key=lambda entry: (entry.year, entry.day))
+    return result
+
+
+def _optional_str(value: object) -> str | None:
+    return None if value is None else str(value)
+
+
+def _format_value(answer: str) -> str:
+    """Format an answer as a TOML value, using an integer if it fits.
+
+    >>> _format_value("123")
+    '123'
+    >>> _format_value("ABC")
+    '"ABC"'
+    >>> _format_value(str(2**70))
+    '"1180591620717411303424"'
+    """
+    if _INT_RE.fullmatch(answer) and -(2**63) <= int(answer) < 2**63:
+        return answer
+    escaped = answer.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def format_manifest(entries: Iterable[ManifestEntry]) -> str:
+    """
+    >>> print(format_manifest([
+    ...     ManifestEntry(year=2025, day=1, part1="1123", part2="abc", budget=1.5),
+    ...     ManifestEntry(year=2025, day=2, part1="7", part2=None, budget=1.0),
+    ... ]))
+    [year2025.day01]
+    part1 = 1123
+    part2 = "abc"
+    budget = 1.5
+    <BLANKLINE>
+    [year2025.day02]
+    part1 = 7
+    budget = 1.0
+    <BLANKLINE>
+    """
+    sections = []
+    for entry in sorted(entries, key=lambda entry: (entry.year, entry.day)):
+        lines = [f"[{entry.section()}]"]
+        for name, answer in [("part1", entry.part1), ("part2", entry.part2)]:
+            if answer is not None:
+                lines.append(f"{name} = {_format_value(answer)}")
+        lines.append(f"budget = {entry.budget}")
+        sections.append("\n".join(lines) + "\n")
+    return "\n".join(sections)
+
+
+def suggest_budget(wall_time: float) -> float:
+    """Suggest a time budget for a day which took `wall_time` seconds, with
+    enough headroom for slower machines.
+
+    >>> suggest_budget(0.01)
+    1.0
+    >>> suggest_budget(2.2)
+    5.0
+    >>> suggest_budget(40.0)
+    80.0
+    """
+    return float(max(1, math.ceil(wall_time * 2)))
+
+
+class AnswerMismatch(Exception):
+    pass
+
+
+def check_entry(entry: ManifestEntry, *, budget_scale: float = 1.0) -> None:
+    """Run the solution for the entry on its real input, raising
+    `AnswerMismatch` if an answer is wrong or the solution took longer than
+    the (scaled) budget. Parts without a recorded answer aren't run."""
+    module = importlib.import_module(f"year{entry.year}.day{entry.day:02}")
+    solution = module.Solution
+    input_path = find_input(Path(inspect.getfile(solution)).parent)
+    if input_path is None:
+        raise AnswerMismatch(f"{entry.section()}: no input found")
+    # Read the raw bytes through the store like `run_all` does, rather than
+    # with newline translation, so the text is the text the answers are for.
+    inputs = InputStore({(entry.year, entry.day): input_path})
+    input_str = inputs.text(entry.year, entry.day)
+    budget = entry.budget * budget_scale
+
+    wall_time = 0.0
+    answers: list[str | None] = []
+    try:
+        with time_limit(budget):
+            (parsed, measurement) = measure_phase(
+                lambda: solution.parse_input(input_str), trace_memory=False
+            )
+            wall_time += measurement.wall_time
+            for part, expected in [
+                (parsed.part1, entry.part1),
+                (parsed.part2, entry.part2),
+            ]:
+                if expected is None:
+                    answers.append(None)
+                    continue
+                (answer, measurement) = measure_phase(part, trace_memory=False)
+                wall_time += measurement.wall_time
+                answers.append(str(answer))
+    except JobTimeout:
+        raise AnswerMismatch(
+            f"{entry.section()}: exceeded the time budget of {budget:g}s"
+        )
+
+    problems = [
+        f"part {part}: expected {expected!r}, got {actual!r}"
+        for (part, expected, actual) in [
+            (1, entry.part1, answers[0]),
+            (2, entry.part2, answers[1]),
+        ]
+        if expected != actual
+    ]
+    if wall_time > budget:
+        problems.append(
+            f"took {wall_time:.2f}s, which exceeds the time budget of {budget:g}s"
+        )
+    if problems:
+        raise AnswerMismatch(f"{entry.section()}: " + "; ".join(problems))
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("answers")
+    group.addoption(
+        "--answers",
+        action="store_true",
+        help="Check the answers for the real inputs recorded in answers.toml.",
+    )
+    group.addoption(
+        "--answers-budget-scale",
+        type=float,
+        default=1.0,
+        help="Multiply the time budgets in answers.toml by this factor, e.g. on slow machines.",
+    )
+
+
+def pytest_collect_file(
+    parent: pytest.Collector, file_path: Path
+) -> pytest.Collector | None:
+    if file_path.name == ANSWERS_PATH.name and parent.config.getoption("answers"):
+        return AnswersFile.from_parent(parent, path=file_path)
+    return None
+
+
+class AnswersFile(pytest.File):
+    def collect(self) -> Iterator[pytest.Item]:
+        for entry in load_manifest(self.path):
+            yield AnswerItem.from_parent(self, name=entry.section(), entry=entry)
+
+
+class AnswerItem(pytest.Item):
+    def __init__(self, *, entry: ManifestEntry, **kwargs: object) -> None:
+        super().__init__(**kwargs)  # type: ignore[arg-type]
+        self.entry = entry
+
+    def runtest(self) -> None:
+        check_entry(
+            self.entry,
+            budget_scale=self.config.getoption("answers_budget_scale"),
+        )
+
+    def repr_failure(
+        self,
+        excinfo: pytest.ExceptionInfo[BaseException],
+        style: object = None,
+    ) -> str:
+        if isinstance(excinfo.value, AnswerMismatch):
+            return str(excinfo.value)
+        return str(super().repr_failure(excinfo))
+
+    def reportinfo(self) -> tuple[Path, int | None, str]:
+        return (self.path, None, self.name)
@@ -5,6 +5,8 @@ import functools
 import heapq
 import itertools
 import operator
+from collections.abc import Hashable
+from dataclasses import dataclass
 from typing import (
     Callable,
     Iterable,
@@ -499,6 +501,107 @@ def floyd_warshall(adjacency: dict[T, dict[T, int]]) -> dict[tuple[T, T], int]:
     return distances
 
 
+@dataclass(frozen=True, kw_only=True)
+class Cycle:
+    """Where the states of a simulation start repeating: the state after
+    `start + length` steps is the same as the state after `start` steps."""
+
+    start: int
+    length: int
+
+    def equivalent_step(self, n: int) -> int:
+        """Return the earliest step whose state is the same as the state after
+        `n` steps.
+
+        >>> Cycle(start=3, length=4).equivalent_step(10**9)
+        4
+        """
+        if n < self.start:
+            return n
+        return self.start + (n - self.start) % self.length
+
+
+def find_cycle(start: T, f: Callable[[T], T]) -> Cycle:
+    """Find the cycle in the sequence `start, f(start), f(f(start)), ...`,
+    using [Brent's algorithm][brent], which only keeps two states at a time
+    and calls `f` `O(start + length)` times. The states must eventually
+    repeat, and `f` must be a pure function of an immutable state.
+
+      [brent]: https://en.wikipedia.org/wiki/Cycle_detection#Brent's_algorithm
+
+    >>> find_cycle(2, lambda x: x * x % 55)
+    Cycle(start=2, length=4)
+    """
+    power = length = 1
+    tortoise = start
+    hare = f(start)
+    while tortoise != hare:
+        if power == length:
+            tortoise = hare
+            power *= 2
+            length = 0
+        hare = f(hare)
+        length += 1
+
+    tortoise = hare = start
+    for _ in range(length):
+        hare = f(hare)
+    mu = 0
+    while tortoise != hare:
+        tortoise = f(tortoise)
+        hare = f(hare)
+        mu += 1
+    return Cycle(start=mu, length=length)
+
+
+def state_at(start: T, f: Callable[[T], T], n: int) -> T:
+    """Return the state after applying `f` to `start` `n` times, skipping
+    through the cycle found by `find_cycle`, so this takes `O(start + length)`
+    calls to `f` however large `n` is.
+
+    >>> state_at(2, lambda x: x * x % 55, 10**18)
+    31
+    """
+    cycle = find_cycle(start, f)
+    state = start
+    for _ in range(cycle.equivalent_step(n)):
+        state = f(state)
+    return state
+
+
+def run_periodic(
+    step: Callable[[], object], fingerprint: Callable[[], Hashable], n: int
+) -> Cycle | None:
+    """Call `step` `n` times to advance a simulation which updates its state in
+    place, unless the state repeats first, in which case whole cycles are
+    skipped. Returns the cycle, if one was found.
+
+    `fingerprint` should return something which identifies the current state,
+    such as `DenseGrid.zobrist_hash().value`. One fingerprint is kept per step
+    until the cycle is found.
+
+    >>> state = [0]
+    >>> def step() -> None:
+    ...     state[0] = (state[0] + 3) % 10 if state[0] else 5
+    >>> run_periodic(step, lambda: state[0], 10**9), state
+    (Cycle(start=0, length=6), [4])
+    >>> state = [0]
+    >>> run_periodic(step, lambda: state[0], 2), state
+    (None, [8])
+    """
+    seen = {fingerprint(): 0}
+    for i in range(1, n + 1):
+        step()
+        key = fingerprint()
+        if key in seen:
+            cycle = Cycle(start=seen[key], length=i - seen[key])
+            for _ in range((n - i) % cycle.length):
+                step()
+            return cycle
+        seen[key] = i
+    return None
+
+
 def find_subsequence(input: Sequence[T], subsequence: Sequence[T]) -> Optional[int]:
     """
     >>> find_subsequence([], [])
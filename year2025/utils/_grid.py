@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import array
 import collections
 import itertools
+import operator
+import random
+import weakref
 from abc import ABC, abstractmethod
 from collections import deque
-from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
+from collections.abc import (
+    Callable,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableSequence,
+    Sequence,
+    Sized,
+)
 from dataclasses import dataclass, field
 from typing import (
+    TYPE_CHECKING,
     AbstractSet,
     Generic,
     Optional,
+    Protocol,
     TypeVar,
+    cast,
     overload,
     override,
 )
@@ -25,16 +42,51 @@ T = TypeVar("T")
 U = TypeVar("U")
 
 
-@dataclass(frozen=True, eq=True, order=True)
+_setattr = object.__setattr__
+
+
+@dataclass(frozen=True, eq=True, order=True, init=False)
 class Coord:
     """A 3D coordinate, represented as a tuple of (x, y, z).
 
     For 2D coordinates, z should be 0.
+
+    Coordinates are created and hashed in hot loops, so they use `__slots__`
+    rather than a `__dict__`, and their hash is computed once up front. (The
+    hash is the same as the dataclass-generated one would be.)
+
+    >>> coord = Coord(1, 2)
+    >>> coord
+    Coord(x=1, y=2, z=0)
+    >>> hash(coord) == hash((1, 2, 0))
+    True
+    >>> hasattr(coord, "__dict__")
+    False
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(coord)) == coord
+    True
     """
 
+    __slots__ = ("x", "y", "z", "_hash")
+
     x: int
     y: int
-    z: int = 0
+    z: int
+    if TYPE_CHECKING:
+        # Not a dataclass field, so that it doesn't appear in `fields` etc.
+        _hash: int
+
+    def __init__(self, x: int, y: int, z: int = 0) -> None:
+        _setattr(self, "x", x)
+        _setattr(self, "y", y)
+        _setattr(self, "z", z)
+        _setattr(self, "_hash", hash((x, y, z)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[type[Coord], tuple[int, int, int]]:
+        return (Coord, (self.x, self.y, self.z))
 
     @classmethod
     def zero(cls) -> "Coord":
@@ -62,10 +114,10 @@ class Coord:
         return (self.x, self.y)
 
     def __add__(self, delta: "Delta") -> "Coord":
-        return Coord(x=self.x + delta.x, y=self.y + delta.y, z=self.z + delta.z)
+        return Coord(self.x + delta.x, self.y + delta.y, self.z + delta.z)
 
     def __sub__(self, other: "Coord") -> "Delta":
-        return Delta(x=self.x - other.x, y=self.y - other.y, z=self.z - other.z)
+        return Delta(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def manhattan_distance(self, other: "Coord") -> int:
         delta = self - other
@@ -101,16 +153,38 @@ class Coord:
                     yield Coord(x=x, y=y, z=z)
 
 
-@dataclass(frozen=True, eq=True, order=True)
+@dataclass(frozen=True, eq=True, order=True, init=False)
 class Delta:
     """A 3D delta, represented as a tuple of (x, y, z).
 
     For 2D deltas, z should be 0.
+
+    Like `Coord`, this uses `__slots__` and a precomputed hash.
+
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(Deltas2d.NORTH)) == Deltas2d.NORTH
+    True
     """
 
+    __slots__ = ("x", "y", "z", "_hash")
+
     x: int
     y: int
     z: int
+    if TYPE_CHECKING:
+        _hash: int
+
+    def __init__(self, x: int, y: int, z: int) -> None:
+        _setattr(self, "x", x)
+        _setattr(self, "y", y)
+        _setattr(self, "z", z)
+        _setattr(self, "_hash", hash((x, y, z)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[type[Delta], tuple[int, int, int]]:
+        return (Delta, (self.x, self.y, self.z))
 
     @classmethod
     def zero(cls) -> "Delta":
@@ -195,6 +269,76 @@ class Delta:
         return max(abs(self.x), abs(self.y), abs(self.z))
 
 
+MAX_COORD_TABLE_SIZE = 1 << 22
+"""The maximum number of coordinates a `CoordTable` can hold (about 400 MB)."""
+
+
+class CoordTable:
+    r"""Interned `Coord`s for every point in a box starting at the origin, such
+    as the bounds of a grid.
+
+    Looking up a coordinate in the table doesn't allocate, and since the same
+    object is returned each time, `set` and `dict` lookups of interned
+    coordinates succeed on the identity check without calling `__eq__`.
+    Coordinates outside the box are created as usual.
+
+    >>> table = CoordTable.for_grid(DenseGrid.from_str("ab\ncd"))
+    >>> table.get(1, 1) is table.get(1, 1)
+    True
+    >>> table.add(Coord(0, 0), Deltas2d.SOUTHEAST) is table.get(1, 1)
+    True
+    >>> table.get(5, 5)
+    Coord(x=5, y=5, z=0)
+    >>> import pytest
+    >>> with pytest.raises(ValueError, match="Too many coordinates"):
+    ...     CoordTable(1 << 12, 1 << 12)
+    """
+
+    def __init__(self, width: int, height: int, depth: int = 1) -> None:
+        size = width * height * depth
+        if size > MAX_COORD_TABLE_SIZE:
+            raise ValueError(
+                f"Too many coordinates to intern: {size} > {MAX_COORD_TABLE_SIZE}"
+            )
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self._coords = [
+            Coord(x, y, z)
+            for z in range(depth)
+            for y in range(height)
+            for x in range(width)
+        ]
+
+    @classmethod
+    def for_grid(cls, grid: DenseGrid[T]) -> CoordTable:
+        return cls(grid.width, grid.height, grid.depth)
+
+    def get(self, x: int, y: int, z: int = 0) -> Coord:
+        width = self.width
+        height = self.height
+        if (x | y | z) >= 0 and x < width and y < height and z < self.depth:
+            return self._coords[x + width * (y + height * z)]
+        return Coord(x, y, z)
+
+    def intern(self, coord: Coord) -> Coord:
+        """Return the interned coordinate equal to `coord`, if any, and
+        otherwise `coord` itself."""
+        x = coord.x
+        y = coord.y
+        z = coord.z
+        width = self.width
+        height = self.height
+        if (x | y | z) >= 0 and x < width and y < height and z < self.depth:
+            return self._coords[x + width * (y + height * z)]
+        return coord
+
+    def add(self, coord: Coord, delta: Delta) -> Coord:
+        """Like `coord + delta`, but returns an interned coordinate if
+        possible."""
+        return self.get(coord.x + delta.x, coord.y + delta.y, coord.z + delta.z)
+
+
 class Deltas2d:
     """Constants for common deltas."""
 
@@ -257,16 +401,225 @@ def test_delta(x: int, y: int, dx: int, dy: int) -> None:
         assert (coord + delta).chess_distance(coord) > 0
 
 
+class _ValueIndex(Generic[T]):
+    """The positions and counts of the values in a `DenseGrid`, which back
+    `find`, `find_where` and `counts` after the first call.
+
+    The grid tells it the old and new value of each cell written through
+    `DenseGrid.__setitem__`, so it doesn't need a copy of the cells, and grids
+    which are never searched pay nothing for it. Positions are only tracked
+    for the values which have been searched for.
+    """
+
+    __slots__ = ("_cells", "_positions", "_counts")
+
+    def __init__(self, cells: Sequence[T]) -> None:
+        self._cells = cells
+        self._positions: dict[T, set[int]] = {}
+        self._counts = collections.Counter(cells)
+
+    def counts(self) -> collections.Counter[T]:
+        """Return a new `Counter` of the values in the grid."""
+        # Drop the values whose counts have fallen to zero.
+        return +self._counts
+
+    def positions(self, values: Collection[T]) -> list[int]:
+        """Return the encoded indices of the cells with any of the given
+        values, in order."""
+        missing = {value for value in values if value not in self._positions}
+        if missing:
+            for value in missing:
+                self._positions[value] = set()
+            for index, cell in enumerate(self._cells):
+                if cell in missing:
+                    self._positions[cell].add(index)
+        if len(values) == 1:
+            return sorted(self._positions[next(iter(values))])
+        return sorted(itertools.chain.from_iterable(self._positions[v] for v in values))
+
+    def set(self, index: int, old_value: T, new_value: T) -> None:
+        """Record that the cell at `index` changed from `old_value` to
+        `new_value`, which must be different."""
+        counts = self._counts
+        counts[old_value] -= 1
+        counts[new_value] += 1
+        positions = self._positions
+        if old_value in positions:
+            positions[old_value].discard(index)
+        if new_value in positions:
+            positions[new_value].add(index)
+
+
+class ZobristHash(Generic[T]):
+    r"""A [Zobrist hash][zobrist] of the cells of a `DenseGrid`, made by
+    `DenseGrid.zobrist_hash`, which is updated in `O(1)` time per changed
+    cell, so a simulation can fingerprint its state after every step without
+    rehashing the whole grid.
+
+      [zobrist]: https://en.wikipedia.org/wiki/Zobrist_hashing
+
+    Each (cell, value) pair gets a random 64-bit key, and `value` is the XOR
+    of the keys of the current values of all cells. Different states may
+    collide, but only with probability about `2**-64` per pair of states.
+
+    >>> grid = DenseGrid.from_str("O...")
+    >>> zobrist = grid.zobrist_hash()
+    >>> initial = zobrist.value
+    >>> def roll() -> None:
+    ...     last = grid[Coord(3, 0)]
+    ...     grid.update({Coord(x, 0): grid[Coord(x - 1, 0)] for x in range(3, 0, -1)})
+    ...     grid[Coord(0, 0)] = last
+    >>> roll()
+    >>> zobrist.value == initial
+    False
+    >>> from year2025.utils import run_periodic
+    >>> run_periodic(roll, lambda: zobrist.value, 10**9)
+    Cycle(start=0, length=4)
+    >>> grid.find_only_exn("O")
+    Coord(x=1, y=0, z=0)
+    """
+
+    __slots__ = ("grid", "value", "_snapshot", "_keys", "_rng", "__weakref__")
+
+    def __init__(self, grid: DenseGrid[T], *, seed: int = 0) -> None:
+        self.grid = grid
+        self._snapshot = grid.cells[:]
+        self._keys: dict[T, array.array[int]] = {}
+        self._rng = random.Random(seed)
+        value = 0
+        for index, cell in enumerate(self._snapshot):
+            value ^= self._keys_for(cell)[index]
+        self.value = value
+
+    def _keys_for(self, cell: T) -> array.array[int]:
+        keys = self._keys.get(cell)
+        if keys is None:
+            keys = array.array("Q", self._rng.randbytes(8 * len(self._snapshot)))
+            self._keys[cell] = keys
+        return keys
+
+    def _patch(self, changed: Iterable[int]) -> None:
+        cells = self.grid.cells
+        snapshot = self._snapshot
+        for index in changed:
+            old_value = snapshot[index]
+            new_value = cells[index]
+            if old_value != new_value:
+                snapshot[index] = new_value
+                self.value ^= (
+                    self._keys_for(old_value)[index] ^ self._keys_for(new_value)[index]
+                )
+
+
+class _CellsListener(Protocol):
+    """Something that's kept up to date with a `DenseGrid`'s cells, which is
+    told the encoded indices of the cells that changed."""
+
+    def _patch(self, changed: Collection[int]) -> None: ...
+
+
+def _check_row_lengths(rows: Sequence[Sized]) -> None:
+    if not all_same(len(row) for row in rows):
+        raise ValueError(
+            "All rows must be the same length, but got rows of lengths {}".format(
+                [len(row) for row in rows]
+            )
+        )
+
+
+_DIGIT_VALUES = bytes.maketrans(b"0123456789", bytes(range(10)))
+"""A `bytes.translate` table from ASCII digits to their values."""
+
+
+_LINE_DIRECTIONS = {
+    Deltas2d.EAST: (Deltas2d.EAST, False),
+    Deltas2d.WEST: (Deltas2d.EAST, True),
+    Deltas2d.SOUTH: (Deltas2d.SOUTH, False),
+    Deltas2d.NORTH: (Deltas2d.SOUTH, True),
+    Deltas2d.SOUTHEAST: (Deltas2d.SOUTHEAST, False),
+    Deltas2d.NORTHWEST: (Deltas2d.SOUTHEAST, True),
+    Deltas2d.SOUTHWEST: (Deltas2d.SOUTHWEST, False),
+    Deltas2d.NORTHEAST: (Deltas2d.SOUTHWEST, True),
+}
+"""For each direction of `DenseGrid.lines`, the direction to build the lines
+in, and whether to reverse them afterwards."""
+
+
 class DenseGrid(Generic[T]):
-    """A 3D grid of values, stored in nested lists. This can also be used as a
-    2D grid by ignoring the z-coordinates.
+    """A 3D grid of values. This can also be used as a 2D grid by ignoring the
+    z-coordinates.
 
     This uses `O(x * y * z)` memory, where `x`, `y`, `z` are the dimensions of the
     grid, i.e. it is dense.
+
+    The cells are stored in a single flat sequence, in which the cell at
+    `(x, y, z)` is at index `x + width * (y + height * z)`. By default this is
+    a `list`, but any mutable sequence can be used via `from_flat`, such as an
+    `array.array` of ints or a `bytearray` of single-byte glyphs, which take
+    much less memory.
     """
 
+    __slots__ = (
+        "_cells",
+        "_width",
+        "_height",
+        "_depth",
+        "_neighbor_tables",
+        "_listeners",
+        "_value_index",
+    )
+
     def __init__(self, cells: list[list[list[T]]]) -> None:
+        """Create a grid from nested lists of layers, rows and cells."""
+        depth = len(cells)
+        height = len(cells[0]) if depth > 0 else 0
+        width = len(cells[0][0]) if height > 0 else 0
+        self._init_flat(
+            [cell for layer in cells for row in layer for cell in row],
+            width=width,
+            height=height,
+            depth=depth,
+        )
+
+    def _init_flat(
+        self, cells: MutableSequence[T], *, width: int, height: int, depth: int
+    ) -> None:
+        if len(cells) != width * height * depth:
+            raise ValueError(
+                f"Expected {width * height * depth} cells for {width=} {height=} {depth=}, but got {len(cells)}"
+            )
         self._cells = cells
+        self._width = width
+        self._height = height
+        self._depth = depth
+        self._neighbor_tables: dict[tuple[Delta, ...], list[tuple[int, ...]]] = {}
+        self._listeners: weakref.WeakSet[_CellsListener] | None = None
+        self._value_index: _ValueIndex[T] | None = None
+
+    @classmethod
+    def from_flat(
+        cls, cells: MutableSequence[T], *, width: int, height: int, depth: int = 1
+    ) -> DenseGrid[T]:
+        """Create a grid backed by the given flat sequence of cells, which is
+        used directly rather than copied.
+
+        >>> import array
+        >>> grid = DenseGrid.from_flat(array.array("b", [1, 2, 3, 4, 5, 6]), width=3, height=2)
+        >>> grid
+        123
+        456
+        >>> grid[Coord.from_2d(0, 1)]
+        4
+        >>> grid.copy()._cells
+        array('b', [1, 2, 3, 4, 5, 6])
+
+        >>> import pytest
+        >>> with pytest.raises(ValueError, match="Expected 4 cells"):
+        ...     DenseGrid.from_flat([1, 2, 3], width=2, height=2)
+        """
+        grid = cls.__new__(cls)
+        grid._init_flat(cells, width=width, height=height, depth=depth)
+        return grid
 
     def __repr__(self) -> str:
         r"""Dump the grid to a string, with the top layer first.
@@ -280,9 +633,12 @@ class DenseGrid(Generic[T]):
 
         """
         layers: list[str] = []
-        for layer in self._cells:
+        width = self._width
+        for z in range(self._depth):
             layer_str: list[str] = []
-            for row in layer:
+            for y in range(self._height):
+                start = width * (y + self._height * z)
+                row = self._cells[start : start + width]
                 layer_str.append("".join(str(cell) for cell in row) + "\n")
             layers.append("".join(layer_str))
         return "---\n".join(layers).strip()
@@ -316,13 +672,12 @@ class DenseGrid(Generic[T]):
         >>> with pytest.raises(ValueError, match="All rows must be the same length"):
         ...     DenseGrid.from_2d([["a", "b"], ["c"]])
         """
-        if not all_same(len(row) for row in rows):
-            raise ValueError(
-                "All rows must be the same length, but got rows of lengths {}".format(
-                    [len(row) for row in rows]
-                )
-            )
-        return cls([rows])
+        _check_row_lengths(rows)
+        return cls.from_flat(
+            [cell for row in rows for cell in row],
+            width=len(rows[0]) if rows else 0,
+            height=len(rows),
+        )
 
     @classmethod
     def from_str(cls, s: str) -> "DenseGrid[str]":
@@ -333,46 +688,354 @@ class DenseGrid(Generic[T]):
         >>> DenseGrid.from_str("ab\ncd")
         ab
         cd
+        >>> import pytest
+        >>> with pytest.raises(ValueError, match="All rows must be the same length"):
+        ...     DenseGrid.from_str("ab\nc")
         """
-        return DenseGrid.from_2d([list(line) for line in s.strip().splitlines()])
+        lines = s.strip().splitlines()
+        _check_row_lengths(lines)
+        return DenseGrid.from_flat(
+            list("".join(lines)),
+            width=len(lines[0]) if lines else 0,
+            height=len(lines),
+        )
 
     @classmethod
-    def from_str_mapped(cls, s: str, f: Callable[[str], T]) -> "DenseGrid[T]":
-        return DenseGrid.from_2d(
-            [[f(c) for c in line] for line in s.strip().splitlines()]
+    def from_str_mapped(
+        cls, s: str, f: Callable[[str], T], *, memoize: bool = False
+    ) -> "DenseGrid[T]":
+        r"""Like `from_str`, but with each character mapped through `f`, which
+        is called once per cell, in row-major order.
+
+        If `memoize` is set, `f` is instead called only once for each distinct
+        character, and every cell with that character shares the result. This
+        is much faster for large grids, but only correct if `f` is a pure
+        function of the character that returns immutable values (such as
+        `int`).
+
+        >>> DenseGrid.from_str_mapped("12\n34", int, memoize=True)
+        12
+        34
+        >>> grid = DenseGrid.from_str_mapped("aa", lambda c: [c])
+        >>> grid[Coord(0, 0)] is grid[Coord(1, 0)]
+        False
+        """
+        lines = s.strip().splitlines()
+        _check_row_lengths(lines)
+        text = "".join(lines)
+        if memoize:
+            mapping = {c: f(c) for c in set(text)}
+            cells = list(map(mapping.__getitem__, text))
+        else:
+            cells = list(map(f, text))
+        return DenseGrid.from_flat(
+            cells,
+            width=len(lines[0]) if lines else 0,
+            height=len(lines),
+        )
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes | bytearray | memoryview | str, *, digits: bool = False
+    ) -> "DenseGrid[int]":
+        r"""Create a new 2D grid from raw input text without making a Python
+        object per cell, for large grids.
+
+        The cells are the byte values of the characters, stored in a
+        `bytearray`, so compare them with e.g. `ord("#")`. If `digits` is set,
+        every character must be a digit, and the cells are the digits' values,
+        stored in an `array.array("b")`. As with `from_str`, the input is
+        `strip`ped first.
+
+        >>> grid = DenseGrid.from_bytes(b"#.\n.#\n")
+        >>> grid[Coord.from_2d(1, 1)] == ord("#"), type(grid.cells).__name__
+        (True, 'bytearray')
+        >>> DenseGrid.from_bytes("019\n234", digits=True)
+        019
+        234
+        >>> import pytest
+        >>> with pytest.raises(ValueError, match="All rows must be the same length"):
+        ...     DenseGrid.from_bytes(b"ab\nc\nde")
+        >>> with pytest.raises(ValueError, match="Expected only digits"):
+        ...     DenseGrid.from_bytes(b"12\n3x", digits=True)
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        data = bytes(data).strip()
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n")
+        if not data:
+            return DenseGrid.from_flat(bytearray(), width=0, height=0)
+        width = data.find(b"\n")
+        if width < 0:
+            width = len(data)
+        # Every row, plus its newline (except the last), must take up exactly
+        # `width + 1` bytes, with the newlines at the ends.
+        height = (len(data) + 1) // (width + 1)
+        if (
+            (width + 1) * height != len(data) + 1
+            or data.count(b"\n") != height - 1
+            or data[width :: width + 1] != b"\n" * (height - 1)
+        ):
+            raise ValueError(
+                "All rows must be the same length, but got rows of lengths {}".format(
+                    [len(line) for line in data.split(b"\n")]
+                )
+            )
+        cells = bytearray(data)
+        del cells[width :: width + 1]
+        if not digits:
+            return DenseGrid.from_flat(cells, width=width, height=height)
+        if cells.translate(None, b"0123456789"):
+            raise ValueError(
+                f"Expected only digits, but got {set(cells.translate(None, b'0123456789').decode())}"
+            )
+        return DenseGrid.from_flat(
+            array.array("b", cells.translate(_DIGIT_VALUES)), width=width, height=height
         )
 
+    def encode(self, coord: Coord) -> int:
+        r"""Encode the coordinate as a small int, which is its index in the
+        flat sequence of cells (`cells`). See `decode` for the inverse.
+
+        Hot searches can use these ints as nodes instead of `Coord`s, since
+        they're much cheaper to hash and compare, and can index into lists
+        such as `cells` or `neighbor_indices`.
+
+        Negative coordinates are out of bounds, rather than wrapping around.
+
+        >>> grid = DenseGrid.from_str("ab\ncd")
+        >>> grid.encode(Coord.from_2d(1, 1))
+        3
+        >>> grid[Coord.from_2d(-1, 0)]
+        Traceback (most recent call last):
+        ...
+        IndexError: coord=Coord(x=-1, y=0, z=0) is out of bounds for self.width=2 self.height=2 self.depth=1
+        """
+        x = coord.x
+        y = coord.y
+        z = coord.z
+        width = self._width
+        height = self._height
+        # `x | y | z` is negative if any of them are.
+        if (x | y | z) >= 0 and x < width and y < height and z < self._depth:
+            return x + width * (y + height * z)
+        raise IndexError(
+            f"{coord=} is out of bounds for {self.width=} {self.height=} {self.depth=}"
+        )
+
+    def decode(self, index: int) -> Coord:
+        r"""Decode an int made by `encode` back into a coordinate.
+
+        >>> grid = DenseGrid.from_str("ab\ncd")
+        >>> grid.decode(3)
+        Coord(x=1, y=1, z=0)
+        >>> all(grid.decode(grid.encode(coord)) == coord for coord in grid.iter_coords())
+        True
+        """
+        if not 0 <= index < len(self._cells):
+            raise IndexError(f"{index=} is out of bounds for {len(self._cells)} cells")
+        (rest, x) = divmod(index, self._width)
+        (z, y) = divmod(rest, self._height)
+        return Coord(x, y, z)
+
+    @property
+    def cells(self) -> MutableSequence[T]:
+        r"""The flat sequence of cells, indexed by `encode`. Changes to it are
+        changes to the grid, but aren't seen by its `adjacency` and
+        `jump_table` tables or by `find` unless followed by a call to
+        `cells_changed`.
+
+        >>> grid = DenseGrid.from_str("ab\ncd")
+        >>> grid.cells[grid.encode(Coord.from_2d(0, 1))]
+        'c'
+        """
+        return self._cells
+
+    def neighbor_indices(self, deltas: Iterable[Delta]) -> list[tuple[int, ...]]:
+        r"""Return a table of the encoded neighbors of each encoded cell, in
+        the directions given by `deltas` (e.g. `Deltas2d.CARDINAL`), leaving
+        out neighbors that are outside the grid.
+
+        The table only depends on the dimensions of the grid, so it's built
+        once per set of deltas and shared with copies of the grid.
+
+        >>> grid = DenseGrid.from_str("abc\ndef\nghi")
+        >>> table = grid.neighbor_indices(Deltas2d.CARDINAL)
+        >>> [grid.cells[i] for i in table[grid.encode(Coord.from_2d(1, 1))]]
+        ['b', 'f', 'h', 'd']
+        >>> [grid.cells[i] for i in table[0]]
+        ['b', 'd']
+        >>> grid.neighbor_indices(Deltas2d.CARDINAL) is table
+        True
+        """
+        key = tuple(deltas)
+        table = self._neighbor_tables.get(key)
+        if table is None:
+            encode = self.encode
+            table = [
+                tuple(
+                    encode(neighbor)
+                    for delta in key
+                    if (neighbor := coord + delta) in self
+                )
+                for coord in self.iter_coords()
+            ]
+            self._neighbor_tables[key] = table
+        return table
+
     def __getitem__(self, coord: Coord) -> T:
         """Get the value at the given coordinate."""
-        (x, y, z) = coord.to_tuple()
-        try:
-            return self._cells[z][y][x]
-        except IndexError as e:
-            raise IndexError(
-                f"{coord=} is out of bounds for {self.width=} {self.height=} {self.depth=}"
-            ) from e
+        # This is `self.encode` inlined for 2D coordinates, since it's the
+        # hottest path in many solutions.
+        x = coord.x
+        y = coord.y
+        width = self._width
+        if 0 <= x < width and 0 <= y < self._height and not coord.z:
+            return self._cells[x + width * y]
+        return self._cells[self.encode(coord)]
 
     def __setitem__(self, coord: Coord, value: T) -> None:
         """Set the value at the given coordinate."""
-        (x, y, z) = coord.to_tuple()
-        try:
-            self._cells[z][y][x] = value
-        except IndexError as e:
-            raise IndexError(
-                f"{coord=} is out of bounds for {self.width=} {self.height=} {self.depth=}"
-            ) from e
+        # As in `__getitem__`.
+        x = coord.x
+        y = coord.y
+        width = self._width
+        if 0 <= x < width and 0 <= y < self._height and not coord.z:
+            index = x + width * y
+        else:
+            index = self.encode(coord)
+        cells = self._cells
+        if self._value_index is not None:
+            old_value = cells[index]
+            if old_value != value:
+                self._value_index.set(index, old_value, value)
+        cells[index] = value
+        if self._listeners:
+            for listener in self._listeners:
+                listener._patch((index,))
+
+    def _set_cells(self, changes: Mapping[int, T]) -> None:
+        """Set the cells at the given encoded indices, keeping the index of
+        values and the listeners up to date."""
+        cells = self._cells
+        values = self._value_index
+        if values is not None:
+            for index, value in changes.items():
+                old_value = cells[index]
+                if old_value != value:
+                    values.set(index, old_value, value)
+        for index, value in changes.items():
+            cells[index] = value
+        if self._listeners:
+            for listener in self._listeners:
+                listener._patch(changes.keys())
+
+    def cells_changed(self, indices: Collection[int]) -> None:
+        """Patch the grid's `adjacency` and `jump_table` tables after the cells
+        at the given encoded indices were changed directly through `cells`.
+
+        The index of values used by `find` doesn't know the old values of the
+        cells, so it's dropped, and rebuilt by the next search."""
+        self._value_index = None
+        if self._listeners:
+            for listener in self._listeners:
+                listener._patch(indices)
+
+    def _add_listener(self, listener: _CellsListener) -> None:
+        if self._listeners is None:
+            self._listeners = weakref.WeakSet()
+        self._listeners.add(listener)
+
+    def zobrist_hash(self, *, seed: int = 0) -> ZobristHash[T]:
+        """Start maintaining a hash of the grid's cells, for detecting repeated
+        states. See `ZobristHash`. The grid only holds a weak reference to it,
+        so the caller must keep it alive."""
+        zobrist_hash = ZobristHash(self, seed=seed)
+        self._add_listener(zobrist_hash)
+        return zobrist_hash
+
+    def overlay(self, cells: Mapping[Coord, T] | None = None) -> OverlayGrid[T]:
+        """Return a copy-on-write view of the grid with the given cells
+        changed, without copying the grid. See `OverlayGrid`."""
+        return OverlayGrid(self, cells)
+
+    def adjacency(
+        self,
+        deltas: Iterable[Delta],
+        passable: Callable[[T], bool] | None = None,
+    ) -> Adjacency[T]:
+        r"""Build a neighbor table for encoded cells, in the directions given
+        by `deltas`, only including neighbors whose values are `passable` (or
+        all of them, if it's `None`).
+
+        The table is kept up to date as the grid changes, by patching only the
+        rows of the cells next to the changed ones.
+
+        >>> grid = DenseGrid.from_str("...\n.#.\n...")
+        >>> adjacency = grid.adjacency(Deltas2d.CARDINAL, lambda value: value != "#")
+        >>> center = grid.encode(Coord.from_2d(1, 1))
+        >>> [grid.decode(i).to_2d() for i in adjacency.neighbors(grid.encode(Coord.from_2d(1, 0)))]
+        [(2, 0), (0, 0)]
+        >>> grid[Coord.from_2d(1, 1)] = "."
+        >>> [grid.decode(i).to_2d() for i in adjacency.neighbors(grid.encode(Coord.from_2d(1, 0)))]
+        [(2, 0), (1, 1), (0, 0)]
+        >>> len(adjacency.neighbors(center))
+        4
+        """
+        adjacency = Adjacency(self, deltas, passable)
+        if passable is not None:
+            self._add_listener(adjacency)
+        return adjacency
+
+    def jump_table(
+        self,
+        predicate: Callable[[T], bool],
+        deltas: Iterable[Delta] = Deltas2d.CARDINAL,
+    ) -> JumpTable[T]:
+        r"""Build a table of the next cell matching `predicate` in each of the
+        directions given by `deltas`, from every cell. See `JumpTable`.
+
+        The table is kept up to date as the grid changes, by patching only the
+        cells on the lines through the changed ones.
+        """
+        jump_table = JumpTable(self, predicate, deltas)
+        self._add_listener(jump_table)
+        return jump_table
 
     def __contains__(self, coord: Coord) -> bool:
         """Return whether the given coordinate is in the grid."""
-        (x, y, z) = coord.to_tuple()
-        return 0 <= x < self.width and 0 <= y < self.height and 0 <= z < self.depth
+        x = coord.x
+        y = coord.y
+        z = coord.z
+        return (
+            (x | y | z) >= 0
+            and x < self._width
+            and y < self._height
+            and z < self._depth
+        )
 
     def __eq__(self, other: object) -> bool:
         """Return whether the two grids are equal (contain the same cells in the
-        same positions)."""
+        same positions), regardless of how the cells are stored.
+
+        >>> import array
+        >>> DenseGrid.from_2d([[1, 2]]) == DenseGrid.from_flat(array.array("q", [1, 2]), width=2, height=1)
+        True
+        >>> DenseGrid.from_2d([[1, 2]]) == DenseGrid.from_2d([[1], [2]])
+        False
+        """
         if not isinstance(other, DenseGrid):
             return NotImplemented
-        return self._cells == other._cells
+        if (self._width, self._height, self._depth) != (
+            other._width,
+            other._height,
+            other._depth,
+        ):
+            return False
+        if type(self._cells) is type(other._cells):
+            return self._cells == other._cells
+        return list(self._cells) == list(other._cells)
 
     @overload
     def get(self, coord: Coord, default: U) -> T | U: ...
@@ -400,10 +1063,21 @@ class DenseGrid(Generic[T]):
         >>> grid = DenseGrid.from_str("abc\nabc\nabc")
         >>> list(grid.find("a"))
         [Coord(x=0, y=0, z=0), Coord(x=0, y=1, z=0), Coord(x=0, y=2, z=0)]
+
+        The first search builds an index of the grid's values, which is kept up
+        to date as the grid changes, so later searches don't scan the grid:
+
+        >>> grid[Coord.from_2d(2, 2)] = "a"
+        >>> list(grid.find("a"))[-1]
+        Coord(x=2, y=2, z=0)
         """
-        for coord in self.iter_coords():
-            if self[coord] == value:
-                yield coord
+        decode = self.decode
+        return [decode(index) for index in self._values().positions((value,))]
+
+    def _values(self) -> _ValueIndex[T]:
+        if self._value_index is None:
+            self._value_index = _ValueIndex(self._cells)
+        return self._value_index
 
     def find_only_exn(self, value: T) -> Coord:
         r"""Find the only coordinate with the given value, or raise an exception if
@@ -425,10 +1099,17 @@ class DenseGrid(Generic[T]):
         >>> grid = DenseGrid.from_str("abc\ndef\nghi")
         >>> list(grid.find_where(lambda x: x in "aeiou"))
         [(Coord(x=0, y=0, z=0), 'a'), (Coord(x=1, y=1, z=0), 'e'), (Coord(x=2, y=2, z=0), 'i')]
+
+        Like `find`, this uses the index of values, so `f` is called once for
+        each distinct value rather than for each cell.
         """
-        for coord, cell in self.iter_cells():
-            if f(cell):
-                yield (coord, cell)
+        values = self._values()
+        cells = self._cells
+        decode = self.decode
+        return [
+            (decode(index), cells[index])
+            for index in values.positions([v for v in values.counts() if f(v)])
+        ]
 
     def counts(self) -> collections.Counter[T]:
         r"""Count the occurrences of each value in the grid.
@@ -437,7 +1118,7 @@ class DenseGrid(Generic[T]):
         >>> grid.counts()
         Counter({'.': 7, '#': 2})
         """
-        return collections.Counter(cell for (_coord, cell) in self.iter_cells())
+        return self._values().counts()
 
     def copy(self) -> "DenseGrid[T]":
         r"""Return a copy of the grid.
@@ -454,9 +1135,14 @@ class DenseGrid(Generic[T]):
         def
         ghi
         """
-        return DenseGrid(
-            [[[cell for cell in row] for row in layer] for layer in self._cells]
+        grid = DenseGrid.from_flat(
+            self._cells[:],
+            width=self._width,
+            height=self._height,
+            depth=self._depth,
         )
+        grid._neighbor_tables = self._neighbor_tables
+        return grid
 
     def replace(self, cells: Mapping[Coord, T]) -> DenseGrid[T]:
         r"""Return a new grid with the updated coordinate-cell mappings, leaving
@@ -492,23 +1178,17 @@ class DenseGrid(Generic[T]):
     @property
     def width(self) -> int:
         """The width of the grid, i.e. the number of columns."""
-        if len(self._cells) > 0 and len(self._cells[0]) > 0:
-            return len(self._cells[0][0])
-        else:
-            return 0
+        return self._width
 
     @property
     def height(self) -> int:
         """The height of the grid, i.e. the number of rows."""
-        if len(self._cells) > 0:
-            return len(self._cells[0])
-        else:
-            return 0
+        return self._height
 
     @property
     def depth(self) -> int:
         """The depth of the grid, i.e. the number of layers."""
-        return len(self._cells)
+        return self._depth
 
     def is_2d(self) -> bool:
         """Return whether the grid is 2D, i.e. has only one layer."""
@@ -516,13 +1196,91 @@ class DenseGrid(Generic[T]):
 
     def rows(self) -> Iterable[list[T]]:
         """Iterate over the rows of the grid, from top to bottom."""
-        for y in range(self.height):
-            yield [self[Coord(x, y, 0)] for x in range(self.width)]
+        width = self._width
+        for y in range(self._height):
+            yield list(self._cells[y * width : (y + 1) * width])
 
     def columns(self) -> Iterable[list[T]]:
         """Iterate over the columns of the grid, from left to right."""
-        for x in range(self.width):
-            yield [self[Coord(x, y, 0)] for y in range(self.height)]
+        width = self._width
+        for x in range(width):
+            yield list(self._cells[x : width * self._height : width])
+
+    def row_views(self) -> list[Sequence[T]]:
+        """Return the rows of the grid, from top to bottom (and then by
+        layer), as views into the grid's cells where possible.
+
+        If the cells support the buffer protocol (e.g. a `bytearray` or an
+        `array.array`), the rows are zero-copy `memoryview`s, which see later
+        changes to the grid. Otherwise they're copies, like `rows`.
+
+        >>> grid = DenseGrid.from_flat(bytearray(b"abcdef"), width=3, height=2)
+        >>> (first, second) = grid.row_views()
+        >>> grid[Coord.from_2d(1, 1)] = ord("x")
+        >>> bytes(second)
+        b'dxf'
+        """
+        width = self._width
+        cells = self._cells
+        try:
+            view: Sequence[T] = cast(Sequence[T], memoryview(cells))  # type: ignore[arg-type]
+        except TypeError:
+            view = cells
+        return [
+            view[start : start + width]
+            for start in range(0, width * self._height * self._depth, width)
+        ]
+
+    def lines(self: DenseGrid[str], delta: Delta) -> list[str]:
+        r"""Return every line of a 2D grid of single characters which runs in
+        the direction of `delta`, read in that direction, as a string. `delta`
+        must be one of `Deltas2d.ALL`.
+
+        This makes it possible to search the grid in every direction with
+        `str.count` or regular expressions over whole lines, rather than
+        stepping through the grid cell by cell. The strings are built by
+        slicing one string of the whole grid, so this takes a few passes over
+        the grid per call.
+
+        >>> grid = DenseGrid.from_str("abc\ndef")
+        >>> grid.lines(Deltas2d.EAST), grid.lines(Deltas2d.NORTH)
+        (['abc', 'def'], ['da', 'eb', 'fc'])
+        >>> sorted(grid.lines(Deltas2d.SOUTHEAST)), sorted(grid.lines(Deltas2d.SOUTHWEST))
+        (['ae', 'bf', 'c', 'd'], ['a', 'bd', 'ce', 'f'])
+        >>> sum(line.count("eb") for delta in Deltas2d.ALL for line in grid.lines(delta))
+        1
+        """
+        if not self.is_2d():
+            raise ValueError("lines() only supports 2D grids")
+        if delta not in _LINE_DIRECTIONS:
+            raise ValueError(f"{delta=} is not one of Deltas2d.ALL")
+        (forward, reverse) = _LINE_DIRECTIONS[delta]
+        width = self._width
+        rows = [
+            "".join(self._cells[start : start + width])
+            for start in range(0, width * self._height, width)
+        ]
+        # Join the rows with a separator, so that stepping through the text
+        # by `row_length` moves straight down a column, and stepping by one
+        # more or less moves diagonally. Diagonals which run off the side of
+        # the grid hit a separator, which splits them apart.
+        text = "".join(row + "\n" for row in rows)
+        row_length = width + 1
+        if forward == Deltas2d.EAST:
+            lines = rows
+        elif forward == Deltas2d.SOUTH:
+            lines = [text[x::row_length] for x in range(width)]
+        else:
+            step = row_length + 1 if forward == Deltas2d.SOUTHEAST else row_length - 1
+            lines = [
+                line
+                for start in range(min(step, len(text)))
+                for line in text[start::step].split("\n")
+                if line
+            ]
+        if reverse:
+            return [line[::-1] for line in lines]
+        return lines
 
     def iter_left_edge(self) -> Iterable[tuple[Coord, T]]:
         r"""Iterate over the left edge of the grid, from top to bottom.
@@ -660,9 +1418,9 @@ class DenseGrid(Generic[T]):
          Coord(x=1, y=2, z=0),
          Coord(x=2, y=2, z=0)]
         """
-        for z in range(self.depth):
-            for y in range(self.height):
-                for x in range(self.width):
+        for z in range(self._depth):
+            for y in range(self._height):
+                for x in range(self._width):
                     yield Coord(x, y, z)
 
     def iter_cells(self) -> Iterable[tuple[Coord, T]]:
@@ -684,10 +1442,9 @@ class DenseGrid(Generic[T]):
          (Coord(x=1, y=2, z=0), 'h'),
          (Coord(x=2, y=2, z=0), 'i')]
         """
-        for coord in self.iter_coords():
-            yield (coord, self[coord])
+        return zip(self.iter_coords(), self._cells)
 
-    def neighbors(self, node: Coord, deltas: list[Delta]) -> Iterable[Coord]:
+    def neighbors(self, node: Coord, deltas: Iterable[Delta]) -> Iterable[Coord]:
         r"""Iterate over the neighbors of the given node in the grid.
 
         >>> grid = DenseGrid.from_str("abc\ndef\nghi")
@@ -703,6 +1460,96 @@ class DenseGrid(Generic[T]):
         """Call `neighbors` with the cardinal directions (`Deltas2d.CARDINAL`)."""
         return self.neighbors(node, deltas=Deltas2d.CARDINAL)
 
+    def convolve(
+        self,
+        kernel: Mapping[Delta, int],
+        f: Callable[[T], int],
+        *,
+        fill: int = 0,
+    ) -> DenseGrid[int]:
+        r"""Return a grid where each cell is the sum of `weight * f(neighbor)`
+        over the `(delta, weight)` pairs in `kernel`.
+
+        Neighbors outside the grid are treated as having the value `fill` (after
+        applying `f`), e.g. for an infinite background.
+
+        This works on whole rows at a time rather than cell by cell: `f` is
+        applied once per cell, and then each kernel entry costs one pass over
+        a shifted copy of the grid, which runs in C. Only 2D grids are
+        supported.
+
+        >>> grid = DenseGrid.from_str("#..\n.#.\n..#")
+        >>> grid.convolve({Deltas2d.WEST: 2, Deltas2d.ZERO: 1}, lambda c: int(c == "#"))
+        120
+        012
+        001
+        >>> grid.convolve({Deltas2d.WEST: 2, Deltas2d.ZERO: 1}, lambda c: int(c == "#"), fill=1)
+        320
+        212
+        201
+        """
+        assert self.is_2d(), "Only 2D grids are supported"
+        assert all(delta.z == 0 for delta in kernel), "Only 2D kernels are supported"
+        width = self._width
+        height = self._height
+        radius = max((max(abs(delta.x), abs(delta.y)) for delta in kernel), default=0)
+
+        # Pad the grid with `radius` cells of `fill` on every side. The extra
+        # `2 * radius` cells at the end let every shifted slice below have the
+        # same length.
+        padded_width = width + 2 * radius
+        values = list(map(f, self._cells))
+        padded = [fill] * (radius * padded_width + radius)
+        side_padding = [fill] * (2 * radius)
+        for y in range(height):
+            padded.extend(values[y * width : (y + 1) * width])
+            padded.extend(side_padding)
+        padded.extend([fill] * (radius * padded_width + radius))
+
+        # `sums[y * padded_width + x]` is the result for `(x, y)`, for `x <
+        # width`. The remaining columns are junk, and are dropped below.
+        length = height * padded_width
+        sums = [0] * length
+        for delta, weight in kernel.items():
+            start = (radius + delta.y) * padded_width + radius + delta.x
+            shifted = padded[start : start + length]
+            if weight != 1:
+                shifted = list(map(weight.__mul__, shifted))
+            sums = list(map(operator.add, sums, shifted))
+
+        cells: list[int] = []
+        for y in range(height):
+            cells.extend(sums[y * padded_width : y * padded_width + width])
+        return DenseGrid.from_flat(cells, width=width, height=height)
+
+    def neighbor_counts(
+        self,
+        predicate: Callable[[T], bool],
+        deltas: Sequence[Delta] = Deltas2d.ALL,
+        *,
+        fill: bool = False,
+    ) -> DenseGrid[int]:
+        r"""Return a grid where each cell is the number of its neighbors (in the
+        directions given by `deltas`) which satisfy `predicate`.
+
+        Neighbors outside the grid count if `fill` is set. See `convolve`.
+
+        >>> grid = DenseGrid.from_str("@@.\n.@.\n...")
+        >>> grid.neighbor_counts(lambda c: c == "@")
+        222
+        322
+        111
+        >>> grid.neighbor_counts(lambda c: c == "@", Deltas2d.CARDINAL, fill=True)
+        333
+        312
+        222
+        """
+        return self.convolve(
+            {delta: 1 for delta in deltas},
+            lambda cell: 1 if predicate(cell) else 0,
+            fill=1 if fill else 0,
+        )
+
     def iter_delta(
         self,
         start: Coord,
@@ -790,6 +1637,646 @@ class DenseGrid(Generic[T]):
             ]
 
 
+@given(
+    st.lists(
+        st.lists(st.sampled_from("ab#"), min_size=3, max_size=3), min_size=1, max_size=4
+    ),
+    st.lists(st.tuples(st.integers(0, 2), st.integers(0, 3), st.sampled_from("ab#"))),
+)
+def test_find_index(rows: list[list[str]], changes: list[tuple[int, int, str]]) -> None:
+    grid = DenseGrid.from_2d(rows)
+    assert list(grid.find("a")) == [c for (c, v) in grid.iter_cells() if v == "a"]
+    overlay = grid.overlay()
+    for x, y, value in changes:
+        coord = Coord.from_2d(x, y)
+        if coord in grid:
+            grid[coord] = value
+            overlay[Coord.from_2d(y % 3, x % grid.height)] = value
+
+    def check_find(grid: DenseGrid[str] | OverlayGrid[str]) -> None:
+        for value in "ab#":
+            assert list(grid.find(value)) == [
+                c for (c, v) in grid.iter_cells() if v == value
+            ]
+
+    check_find(grid)
+    check_find(overlay)
+    assert list(grid.find_where(lambda v: v != "#")) == [
+        (c, v) for (c, v) in grid.iter_cells() if v != "#"
+    ]
+    assert grid.counts() == collections.Counter(v for (_, v) in grid.iter_cells())
+    assert overlay.counts() == collections.Counter(v for (_, v) in overlay.iter_cells())
+
+    overlay.commit()
+    check_find(grid)
+    assert grid.counts() == collections.Counter(v for (_, v) in grid.iter_cells())
+    grid.cells[0] = "b"
+    grid.cells_changed([0])
+    check_find(grid)
+
+
+@given(
+    st.integers(1, 5).flatmap(
+        lambda width: st.lists(
+            st.text("ab", min_size=width, max_size=width), min_size=1, max_size=5
+        )
+    )
+)
+def test_lines(rows: list[str]) -> None:
+    grid = DenseGrid.from_str("\n".join(rows))
+    for delta in Deltas2d.ALL:
+        expected = collections.Counter(
+            "".join(cell for (_, cell) in grid.iter_delta(coord, delta))
+            for coord in grid.iter_coords()
+            if coord + -delta not in grid
+        )
+        assert collections.Counter(grid.lines(delta)) == expected
+
+
+@given(
+    st.lists(st.lists(st.booleans(), min_size=3, max_size=3), min_size=1, max_size=4),
+    st.booleans(),
+)
+def test_neighbor_counts(rows: list[list[bool]], fill: bool) -> None:
+    grid = DenseGrid.from_2d(rows)
+    counts = grid.neighbor_counts(lambda cell: cell, fill=fill)
+    for coord in grid.iter_coords():
+        expected = sum(
+            grid[coord + delta] if coord + delta in grid else fill
+            for delta in Deltas2d.ALL
+        )
+        assert counts[coord] == expected
+
+
+class Adjacency(Generic[T]):
+    """A neighbor table for the encoded cells of a `DenseGrid`, made by
+    `DenseGrid.adjacency`.
+
+    It's stored in CSR (compressed sparse row) form: the neighbors of cell `i`
+    are `indices[offsets[i]:ends[i]]`. Each row has room for all of the cell's
+    neighbors within the grid, between `offsets[i]` and `offsets[i + 1]`, so
+    that a row can be patched in place when a neighbor becomes passable or
+    impassable.
+    """
+
+    __slots__ = (
+        "grid",
+        "deltas",
+        "passable",
+        "offsets",
+        "ends",
+        "indices",
+        "_table",
+        "_reverse_table",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        grid: DenseGrid[T],
+        deltas: Iterable[Delta],
+        passable: Callable[[T], bool] | None = None,
+    ) -> None:
+        self.grid = grid
+        self.deltas = tuple(deltas)
+        self.passable = passable
+        self._table = grid.neighbor_indices(self.deltas)
+        self._reverse_table = grid.neighbor_indices(-delta for delta in self.deltas)
+        self.offsets = array.array("q", [0])
+        self.ends = array.array("q")
+        self.indices = array.array("q")
+        cells = grid.cells
+        for row in self._table:
+            start = len(self.indices)
+            if passable is None:
+                self.indices.extend(row)
+            else:
+                self.indices.extend(j for j in row if passable(cells[j]))
+            self.ends.append(len(self.indices))
+            self.indices.extend(row[: start + len(row) - len(self.indices)])
+            self.offsets.append(len(self.indices))
+
+    def neighbors(self, index: int) -> array.array[int]:
+        """Return the encoded neighbors of the encoded cell `index`."""
+        return self.indices[self.offsets[index] : self.ends[index]]
+
+    def _patch(self, changed: Iterable[int]) -> None:
+        passable = self.passable
+        if passable is None:
+            return
+        cells = self.grid.cells
+        table = self._table
+        offsets = self.offsets
+        for index in {i for j in changed for i in self._reverse_table[j]}:
+            row = [j for j in table[index] if passable(cells[j])]
+            start = offsets[index]
+            self.indices[start : start + len(row)] = array.array("q", row)
+            self.ends[index] = start + len(row)
+
+
+@given(
+    st.lists(st.lists(st.booleans(), min_size=3, max_size=3), min_size=1, max_size=4),
+    st.lists(st.tuples(st.integers(0, 2), st.integers(0, 3), st.booleans())),
+)
+def test_adjacency_patching(
+    rows: list[list[bool]], changes: list[tuple[int, int, bool]]
+) -> None:
+    grid = DenseGrid.from_2d(rows)
+    adjacency = grid.adjacency(Deltas2d.ALL, passable=lambda cell: cell)
+    for x, y, value in changes:
+        coord = Coord.from_2d(x, y)
+        if coord in grid:
+            grid[coord] = value
+    expected = grid.adjacency(Deltas2d.ALL, passable=lambda cell: cell)
+    for index in range(len(grid.cells)):
+        assert list(adjacency.neighbors(index)) == list(expected.neighbors(index))
+
+
+class JumpTable(Generic[T]):
+    r"""For every cell of a `DenseGrid` and each of the given directions, the
+    next cell in that direction whose value matches a predicate, made by
+    `DenseGrid.jump_table`.
+
+    This turns walks that step one cell at a time until they hit something
+    into one lookup per turn. Building the table takes `O(cells)` time per
+    direction, and changing a cell only patches the cells behind it in each
+    direction, up to the previous match.
+
+    >>> grid = DenseGrid.from_str("....#.....\n.........#\n..........\n..#.......\n.......#..")
+    >>> obstacles = grid.jump_table(lambda cell: cell == "#")
+    >>> def walk(coord: Coord, delta: Delta) -> list[tuple[int, int]]:
+    ...     turns = [coord.to_2d()]
+    ...     while (obstacle := obstacles.next(coord, delta)) is not None:
+    ...         coord = obstacle + -delta
+    ...         delta = delta.rotate_cw()
+    ...         turns.append(coord.to_2d())
+    ...     return turns
+    >>> walk(Coord.from_2d(4, 3), Deltas2d.NORTH)
+    [(4, 3), (4, 1), (8, 1)]
+    >>> grid[Coord.from_2d(8, 4)] = "#"
+    >>> walk(Coord.from_2d(4, 3), Deltas2d.NORTH)
+    [(4, 3), (4, 1), (8, 1), (8, 3), (3, 3)]
+    """
+
+    __slots__ = ("grid", "predicate", "_tables", "__weakref__")
+
+    def __init__(
+        self,
+        grid: DenseGrid[T],
+        predicate: Callable[[T], bool],
+        deltas: Iterable[Delta] = Deltas2d.CARDINAL,
+    ) -> None:
+        self.grid = grid
+        self.predicate = predicate
+        matches = [predicate(cell) for cell in grid.cells]
+        self._tables = {delta: self._build(matches, delta) for delta in deltas}
+
+    def _build(self, matches: list[bool], delta: Delta) -> array.array[int]:
+        # Visit the cells in an order such that `i + step` is always visited
+        # before `i`, i.e. starting from the far end of each axis.
+        (width, height, depth) = (self.grid.width, self.grid.height, self.grid.depth)
+        (dx, dy, dz) = delta.to_tuple()
+        step = dx + width * (dy + height * dz)
+        table = array.array("q", [-1]) * len(matches)
+        for z in range(depth - 1, -1, -1) if dz > 0 else range(depth):
+            if not 0 <= z + dz < depth:
+                continue
+            for y in range(height - 1, -1, -1) if dy > 0 else range(height):
+                if not 0 <= y + dy < height:
+                    continue
+                row_start = width * (y + height * z)
+                for x in range(width - 1, -1, -1) if dx > 0 else range(width):
+                    if 0 <= x + dx < width:
+                        i = row_start + x
+                        j = i + step
+                        table[i] = j if matches[j] else table[j]
+        return table
+
+    def next_index(self, index: int, delta: Delta) -> int:
+        """Return the encoded index of the next matching cell after the
+        encoded cell `index` in the direction `delta`, or -1 if there is
+        none before the edge of the grid."""
+        return self._tables[delta][index]
+
+    def next(self, coord: Coord, delta: Delta) -> Coord | None:
+        """Return the next matching cell after `coord` in the direction
+        `delta`, or `None` if there is none before the edge of the grid."""
+        index = self._tables[delta][self.grid.encode(coord)]
+        return None if index < 0 else self.grid.decode(index)
+
+    def _patch(self, changed: Iterable[int]) -> None:
+        grid = self.grid
+        cells = grid.cells
+        predicate = self.predicate
+        for index in changed:
+            coord = grid.decode(index)
+            for delta, table in self._tables.items():
+                # Each entry only depends on the cell after it and that cell's
+                # entry, so stop at the first entry which doesn't change.
+                backwards = -delta
+                j = index
+                previous = coord + backwards
+                while previous in grid:
+                    i = grid.encode(previous)
+                    new_value = j if predicate(cells[j]) else table[j]
+                    if table[i] == new_value:
+                        break
+                    table[i] = new_value
+                    j = i
+                    previous += backwards
+
+
+@given(
+    st.lists(st.lists(st.booleans(), min_size=4, max_size=4), min_size=1, max_size=4),
+    st.lists(st.tuples(st.integers(0, 3), st.integers(0, 3), st.booleans())),
+)
+def test_jump_table_patching(
+    rows: list[list[bool]], changes: list[tuple[int, int, bool]]
+) -> None:
+    grid = DenseGrid.from_2d(rows)
+    jump_table = grid.jump_table(lambda cell: cell, Deltas2d.ALL)
+    grid.update(
+        {
+            coord: value
+            for (x, y, value) in changes
+            if (coord := Coord.from_2d(x, y)) in grid
+        }
+    )
+    for coord in grid.iter_coords():
+        for delta in Deltas2d.ALL:
+            expected = next(
+                (
+                    c
+                    for (c, cell) in grid.iter_delta(coord, delta, include_start=False)
+                    if cell
+                ),
+                None,
+            )
+            assert jump_table.next(coord, delta) == expected
+
+
+class OverlayGrid(Generic[T]):
+    r"""A copy-on-write view of a `DenseGrid`: the base grid plus a dict of
+    the cells that have been changed since, which has the same read API as
+    `DenseGrid`.
+
+    Making a variant of a large grid with a few cells changed (e.g. to try
+    each possible position of an obstacle) costs `O(changes)` rather than
+    copying the whole grid. Changes are never written to the base grid until
+    `commit` is called.
+
+    >>> base = DenseGrid.from_str("...\n...")
+    >>> variant = base.overlay({Coord.from_2d(1, 0): "#"})
+    >>> variant
+    .#.
+    ...
+    >>> variant[Coord.from_2d(1, 0)], base[Coord.from_2d(1, 0)]
+    ('#', '.')
+    >>> other = variant.replace({Coord.from_2d(2, 1): "#"})
+    >>> other.changes()
+    {Coord(x=1, y=0, z=0): '#', Coord(x=2, y=1, z=0): '#'}
+    >>> variant.changes()
+    {Coord(x=1, y=0, z=0): '#'}
+    >>> other.commit() is base
+    True
+    >>> base
+    .#.
+    ..#
+    """
+
+    __slots__ = ("base", "_overrides")
+
+    def __init__(
+        self, base: DenseGrid[T], cells: Mapping[Coord, T] | None = None
+    ) -> None:
+        self.base = base
+        self._overrides: dict[int, T] = {}
+        if cells is not None:
+            self.update(cells)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dense())
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether the two grids contain the same cells in the same
+        positions. Either may be a `DenseGrid`.
+
+        >>> grid = DenseGrid.from_str("ab")
+        >>> grid.overlay({Coord.from_2d(0, 0): "a"}) == grid
+        True
+        """
+        if isinstance(other, OverlayGrid):
+            other = other.to_dense()
+        if not isinstance(other, DenseGrid):
+            return NotImplemented
+        return self.to_dense() == other
+
+    def __getitem__(self, coord: Coord) -> T:
+        index = self.base.encode(coord)
+        overrides = self._overrides
+        if index in overrides:
+            return overrides[index]
+        return self.base.cells[index]
+
+    def __setitem__(self, coord: Coord, value: T) -> None:
+        self._set(self.base.encode(coord), value)
+
+    def _set(self, index: int, value: T) -> None:
+        # Setting a cell back to its value in the base grid drops the
+        # override rather than storing it.
+        if self.base.cells[index] == value:
+            self._overrides.pop(index, None)
+        else:
+            self._overrides[index] = value
+
+    def _apply(self, cells: Iterable[tuple[Coord, T]]) -> Iterator[tuple[Coord, T]]:
+        """Apply the changes to cells read from the base grid."""
+        overrides = self._overrides
+        encode = self.base.encode
+        for coord, value in cells:
+            yield (coord, overrides.get(encode(coord), value) if overrides else value)
+
+    def __contains__(self, coord: Coord) -> bool:
+        return coord in self.base
+
+    def encode(self, coord: Coord) -> int:
+        """See `DenseGrid.encode`."""
+        return self.base.encode(coord)
+
+    def decode(self, index: int) -> Coord:
+        """See `DenseGrid.decode`."""
+        return self.base.decode(index)
+
+    @overload
+    def get(self, coord: Coord, default: U) -> T | U: ...
+
+    @overload
+    def get(self, coord: Coord) -> T | None: ...
+
+    def get(self, coord: Coord, default: object = None) -> object:
+        if coord in self.base:
+            return self[coord]
+        return default
+
+    @property
+    def width(self) -> int:
+        return self.base.width
+
+    @property
+    def height(self) -> int:
+        return self.base.height
+
+    @property
+    def depth(self) -> int:
+        return self.base.depth
+
+    def is_2d(self) -> bool:
+        return self.base.is_2d()
+
+    def changes(self) -> dict[Coord, T]:
+        """The cells which differ from the base grid, with their new values.
+
+        >>> grid = DenseGrid.from_str("ab")
+        >>> overlay = grid.overlay({Coord.from_2d(0, 0): "a", Coord.from_2d(1, 0): "c"})
+        >>> overlay.changes()
+        {Coord(x=1, y=0, z=0): 'c'}
+        >>> grid[Coord.from_2d(1, 0)] = "c"
+        >>> overlay.changes()
+        {}
+        """
+        cells = self.base.cells
+        decode = self.base.decode
+        return {
+            decode(index): value
+            for (index, value) in self._overrides.items()
+            if cells[index] != value
+        }
+
+    def iter_coords(self) -> Iterable[Coord]:
+        return self.base.iter_coords()
+
+    def iter_cells(self) -> Iterable[tuple[Coord, T]]:
+        overrides = self._overrides
+        for index, (coord, cell) in enumerate(self.base.iter_cells()):
+            yield (coord, overrides.get(index, cell))
+
+    def rows(self) -> Iterable[list[T]]:
+        return self.to_dense().rows()
+
+    def columns(self) -> Iterable[list[T]]:
+        return self.to_dense().columns()
+
+    def row_views(self) -> list[Sequence[T]]:
+        """Like `DenseGrid.row_views`, but the rows are of a copy of the grid
+        with the changes applied, so they don't see later changes."""
+        return self.to_dense().row_views()
+
+    def lines(self: OverlayGrid[str], delta: Delta) -> list[str]:
+        return self.to_dense().lines(delta)
+
+    def iter_left_edge(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_left_edge())
+
+    def iter_right_edge(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_right_edge())
+
+    def iter_vertical_edges(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_vertical_edges())
+
+    def iter_top_edge(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_top_edge())
+
+    def iter_bottom_edge(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_bottom_edge())
+
+    def iter_horizontal_edges(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_horizontal_edges())
+
+    def iter_edges(self) -> Iterable[tuple[Coord, T]]:
+        return self._apply(self.base.iter_edges())
+
+    def iter_delta(
+        self,
+        start: Coord,
+        delta: Delta,
+        *,
+        include_start: bool = True,
+        max_steps: Optional[int] = None,
+    ) -> Iterable[tuple[Coord, T]]:
+        return self._apply(
+            self.base.iter_delta(
+                start, delta, include_start=include_start, max_steps=max_steps
+            )
+        )
+
+    def iter_deltas(
+        self,
+        start: Coord,
+        deltas: Iterable[Delta],
+        *,
+        include_start: bool = True,
+        max_steps: Optional[int] = None,
+    ) -> Iterable[Sequence[tuple[Coord, T, Delta]]]:
+        for delta in deltas:
+            yield [
+                (coord, value, delta)
+                for coord, value in self.iter_delta(
+                    start, delta, include_start=include_start, max_steps=max_steps
+                )
+            ]
+
+    def find(self, value: T) -> Iterable[Coord]:
+        """Find all coordinates with the given value, using the base grid's
+        index of values (see `DenseGrid.find`) and the changes."""
+        base = self.base
+        overrides = self._overrides
+        indices = {
+            index
+            for index in base._values().positions((value,))
+            if index not in overrides
+        }
+        indices.update(index for (index, cell) in overrides.items() if cell == value)
+        return [base.decode(index) for index in sorted(indices)]
+
+    def find_only_exn(self, value: T) -> Coord:
+        return only_exn(self.find(value))
+
+    def find_where(self, f: Callable[[T], bool]) -> Iterable[tuple[Coord, T]]:
+        """Like `find`, but for the values satisfying `f`."""
+        base = self.base
+        cells = base.cells
+        overrides = self._overrides
+        values = base._values()
+        indices = {
+            index
+            for index in values.positions([v for v in values.counts() if f(v)])
+            if index not in overrides
+        }
+        indices.update(index for (index, cell) in overrides.items() if f(cell))
+        return [
+            (base.decode(index), overrides.get(index, cells[index]))
+            for index in sorted(indices)
+        ]
+
+    def counts(self) -> collections.Counter[T]:
+        base = self.base
+        cells = base.cells
+        counts = base.counts()
+        for index, cell in self._overrides.items():
+            counts[cells[index]] -= 1
+            counts[cell] += 1
+        # Drop the values which were completely overridden.
+        return +counts
+
+    def neighbors(self, node: Coord, deltas: Iterable[Delta]) -> Iterable[Coord]:
+        return self.base.neighbors(node, deltas)
+
+    def neighbors_cardinal(self, node: Coord) -> Iterable[Coord]:
+        return self.base.neighbors_cardinal(node)
+
+    def convolve(
+        self,
+        kernel: Mapping[Delta, int],
+        f: Callable[[T], int],
+        *,
+        fill: int = 0,
+    ) -> DenseGrid[int]:
+        return self.to_dense().convolve(kernel, f, fill=fill)
+
+    def neighbor_counts(
+        self,
+        predicate: Callable[[T], bool],
+        deltas: Sequence[Delta] = Deltas2d.ALL,
+        *,
+        fill: bool = False,
+    ) -> DenseGrid[int]:
+        return self.to_dense().neighbor_counts(predicate, deltas, fill=fill)
+
+    def copy(self) -> OverlayGrid[T]:
+        """Return a copy of the overlay, sharing the same base grid. This takes
+        `O(changes)` time."""
+        result = OverlayGrid(self.base)
+        result._overrides = self._overrides.copy()
+        return result
+
+    def replace(self, cells: Mapping[Coord, T]) -> OverlayGrid[T]:
+        result = self.copy()
+        result.update(cells)
+        return result
+
+    def update(self, cells: Mapping[Coord, T]) -> None:
+        encode = self.base.encode
+        for coord, value in cells.items():
+            self._set(encode(coord), value)
+
+    def commit(self) -> DenseGrid[T]:
+        """Write the changes to the base grid in `O(changes)` time, and return
+        it. Other overlays of the same base grid will see the changes too,
+        unless they've overridden the same cells."""
+        base = self.base
+        base._set_cells(self._overrides)
+        self._overrides = {}
+        return base
+
+    def to_dense(self) -> DenseGrid[T]:
+        """Return a new `DenseGrid` with the changes applied, leaving the base
+        grid unchanged."""
+        result = self.base.copy()
+        cells = result.cells
+        for index, value in self._overrides.items():
+            cells[index] = value
+        return result
+
+
+@given(
+    st.lists(
+        st.lists(st.sampled_from(".#"), min_size=3, max_size=3), min_size=1, max_size=4
+    ),
+    st.lists(st.tuples(st.integers(0, 2), st.integers(0, 3), st.sampled_from(".#"))),
+)
+def test_overlay_grid_reads(
+    rows: list[list[str]], changes: list[tuple[int, int, str]]
+) -> None:
+    base = DenseGrid.from_2d(rows)
+    overlay = base.overlay(
+        {
+            Coord.from_2d(x, y): value
+            for (x, y, value) in changes
+            if Coord.from_2d(x, y) in base
+        }
+    )
+    dense = overlay.to_dense()
+    assert all(dense[coord] != base[coord] for coord in overlay.changes())
+    assert list(overlay.rows()) == list(dense.rows())
+    assert list(overlay.columns()) == list(dense.columns())
+    assert [list(row) for row in overlay.row_views()] == list(dense.rows())
+    for delta in Deltas2d.ALL:
+        assert overlay.lines(delta) == dense.lines(delta)
+    for method in [
+        "iter_left_edge",
+        "iter_right_edge",
+        "iter_vertical_edges",
+        "iter_top_edge",
+        "iter_bottom_edge",
+        "iter_horizontal_edges",
+        "iter_edges",
+    ]:
+        assert list(getattr(overlay, method)()) == list(getattr(dense, method)())
+    start = Coord.from_2d(1, 0)
+    assert list(overlay.iter_delta(start, Deltas2d.SOUTH)) == list(
+        dense.iter_delta(start, Deltas2d.SOUTH)
+    )
+    assert list(overlay.iter_deltas(start, Deltas2d.ALL, max_steps=2)) == list(
+        dense.iter_deltas(start, Deltas2d.ALL, max_steps=2)
+    )
+    assert list(overlay.find_where(lambda v: v == "#")) == list(
+        dense.find_where(lambda v: v == "#")
+    )
+    assert overlay.neighbor_counts(lambda v: v == "#") == dense.neighbor_counts(
+        lambda v: v == "#"
+    )
+
+
 class SparseGrid(Generic[T]):
     def __init__(self, cells: dict[Coord, T]) -> None:
         self._cells = cells
@@ -871,6 +2358,595 @@ class SparseGrid(Generic[T]):
             yield (coord, value)
 
 
+_TILE_BITS = 6
+
+TILE_SIZE = 1 << _TILE_BITS
+"""The width and height of the tiles of a `ChunkedSparseGrid`."""
+
+_TILE_MASK = TILE_SIZE - 1
+
+
+class _Empty:
+    """Marks unassigned cells in the tiles of a `ChunkedSparseGrid`."""
+
+
+_EMPTY = _Empty()
+
+
+class ChunkedSparseGrid(Generic[T]):
+    r"""A drop-in replacement for `SparseGrid` for large or dense regions.
+
+    Cells are stored in `TILE_SIZE` x `TILE_SIZE` tiles (one per layer),
+    which are created as cells are assigned, so the grid grows in any
+    direction as needed. The bounding box is kept up to date as cells are
+    assigned and deleted, so `width`, `height` and `__repr__` don't scan every
+    cell. It counts the cells on each of its faces, and is only recomputed
+    after the last cell on one of them is deleted.
+
+    >>> grid = ChunkedSparseGrid({Coord.from_2d(-1, 0): "a", Coord.from_2d(100, 2): "b"})
+    >>> (grid.width(), grid.height(), len(grid))
+    (102, 3, 2)
+    >>> grid[Coord.from_2d(100, 2)]
+    'b'
+    >>> del grid[Coord.from_2d(100, 2)]
+    >>> grid[Coord.from_2d(1, 1)] = "c"
+    >>> grid
+    a..
+    ..c
+    >>> grid.bounds()
+    (Coord(x=-1, y=0, z=0), Coord(x=1, y=1, z=0))
+    """
+
+    __slots__ = (
+        "_tiles",
+        "_coords",
+        "_counts",
+        "_len",
+        "_bounds",
+        "_face_counts",
+        "_bounds_stale",
+    )
+
+    def __init__(self, cells: Mapping[Coord, T] | None = None) -> None:
+        self._tiles: dict[tuple[int, int, int], list[T | _Empty]] = {}
+        # The `Coord`s of the assigned cells, so that `iter_cells` doesn't
+        # have to create them.
+        self._coords: dict[tuple[int, int, int], list[Coord | None]] = {}
+        self._counts: dict[tuple[int, int, int], int] = {}
+        self._len = 0
+        self._bounds: tuple[Coord, Coord] | None = None
+        # The number of cells on the min-x, max-x, min-y, max-y, min-z and
+        # max-z faces of `_bounds`.
+        self._face_counts = [0] * 6
+        self._bounds_stale = False
+        if cells is not None:
+            for coord, value in cells.items():
+                self[coord] = value
+
+    def __repr__(self) -> str:
+        """Dump the grid to a string, with the top row first."""
+        if self._len == 0:
+            return ""
+        (min_coord, max_coord) = self.bounds()
+        lines = []
+        for y in range(min_coord.y, max_coord.y + 1):
+            line = []
+            for x in range(min_coord.x, max_coord.x + 1):
+                line.append(str(self.get(Coord(x, y, 0), ".")))
+            lines.append("".join(line))
+        return "\n".join(lines)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, ChunkedSparseGrid)
+            and self._len == other._len
+            and dict(self.iter_cells()) == dict(other.iter_cells())
+        )
+
+    @staticmethod
+    def _locate(coord: Coord) -> tuple[tuple[int, int, int], int]:
+        # Shifting and masking rounds towards negative infinity, like `divmod`.
+        x = coord.x
+        y = coord.y
+        return (
+            (x >> _TILE_BITS, y >> _TILE_BITS, coord.z),
+            (x & _TILE_MASK) | (y & _TILE_MASK) << _TILE_BITS,
+        )
+
+    def __getitem__(self, coord: Coord) -> T:
+        """Get the value at the given coordinate."""
+        # This is `self._locate` inlined.
+        x = coord.x
+        y = coord.y
+        tile = self._tiles.get((x >> _TILE_BITS, y >> _TILE_BITS, coord.z))
+        if tile is not None:
+            value = tile[(x & _TILE_MASK) | (y & _TILE_MASK) << _TILE_BITS]
+            if value is not _EMPTY:
+                return value  # type: ignore[return-value]
+        raise KeyError(coord)
+
+    def __setitem__(self, coord: Coord, value: T) -> None:
+        """Set the value at the given coordinate."""
+        (key, index) = self._locate(coord)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = [_EMPTY] * (TILE_SIZE * TILE_SIZE)
+            self._coords[key] = [None] * (TILE_SIZE * TILE_SIZE)
+            self._counts[key] = 0
+        if tile[index] is _EMPTY:
+            self._coords[key][index] = coord
+            self._counts[key] += 1
+            self._len += 1
+            if self._bounds is None:
+                if not self._bounds_stale:
+                    self._bounds = (coord, coord)
+                    self._face_counts = [1] * 6
+            else:
+                self._extend_bounds(coord)
+        tile[index] = value
+
+    def _extend_bounds(self, coord: Coord) -> None:
+        """Update the bounding box and its face counts for a new cell."""
+        (min_coord, max_coord) = self._bounds  # type: ignore[misc]
+        counts = self._face_counts
+        extended = False
+        for face, (value, low, high) in enumerate(
+            [
+                (coord.x, min_coord.x, max_coord.x),
+                (coord.y, min_coord.y, max_coord.y),
+                (coord.z, min_coord.z, max_coord.z),
+            ]
+        ):
+            if value < low:
+                counts[2 * face] = 1
+                extended = True
+            elif value == low:
+                counts[2 * face] += 1
+            if value > high:
+                counts[2 * face + 1] = 1
+                extended = True
+            elif value == high:
+                counts[2 * face + 1] += 1
+        if extended:
+            self._bounds = (
+                Coord(
+                    min(min_coord.x, coord.x),
+                    min(min_coord.y, coord.y),
+                    min(min_coord.z, coord.z),
+                ),
+                Coord(
+                    max(max_coord.x, coord.x),
+                    max(max_coord.y, coord.y),
+                    max(max_coord.z, coord.z),
+                ),
+            )
+
+    def __delitem__(self, coord: Coord) -> None:
+        """Delete the value at the given coordinate."""
+        (key, index) = self._locate(coord)
+        tile = self._tiles.get(key)
+        if tile is None or tile[index] is _EMPTY:
+            raise KeyError(coord)
+        tile[index] = _EMPTY
+        self._coords[key][index] = None
+        self._len -= 1
+        self._counts[key] -= 1
+        if self._counts[key] == 0:
+            del self._tiles[key]
+            del self._coords[key]
+            del self._counts[key]
+        if self._bounds is not None:
+            (min_coord, max_coord) = self._bounds
+            counts = self._face_counts
+            for face, (value, low, high) in enumerate(
+                [
+                    (coord.x, min_coord.x, max_coord.x),
+                    (coord.y, min_coord.y, max_coord.y),
+                    (coord.z, min_coord.z, max_coord.z),
+                ]
+            ):
+                if value == low:
+                    counts[2 * face] -= 1
+                if value == high:
+                    counts[2 * face + 1] -= 1
+            if 0 in counts:
+                # The box might shrink on that side.
+                self._bounds = None
+                self._bounds_stale = True
+
+    def __contains__(self, coord: Coord) -> bool:
+        """Return whether the given coordinate has been assigned in the grid."""
+        (key, index) = self._locate(coord)
+        tile = self._tiles.get(key)
+        return tile is not None and tile[index] is not _EMPTY
+
+    def __len__(self) -> int:
+        """Return the number of coordinates that have been assigned in the
+        grid.
+        """
+        return self._len
+
+    def bounds(self) -> tuple[Coord, Coord]:
+        """Return the minimum and maximum coordinates of the assigned cells, in
+        each dimension. Raises `ValueError` if there are none."""
+        if self._bounds_stale:
+            self._bounds_stale = False
+            if self._len > 0:
+                coords = [coord for (coord, _) in self.iter_cells()]
+                lows = []
+                highs = []
+                self._face_counts = []
+                for values in [
+                    [c.x for c in coords],
+                    [c.y for c in coords],
+                    [c.z for c in coords],
+                ]:
+                    (low, high) = minmax(values)
+                    lows.append(low)
+                    highs.append(high)
+                    self._face_counts += [values.count(low), values.count(high)]
+                self._bounds = (Coord(*lows), Coord(*highs))
+        if self._bounds is None:
+            raise ValueError("bounds() of an empty ChunkedSparseGrid")
+        return self._bounds
+
+    def width(self) -> int:
+        """Return the implied width of the grid, starting from the coordinate with the
+        least x-coordinate and ending at the coordinate with the greatest x-coordinate.
+        """
+        (min_coord, max_coord) = self.bounds()
+        return max_coord.x - min_coord.x + 1
+
+    def height(self) -> int:
+        """Return the implied height of the grid, starting from the coordinate with the
+        least y-coordinate and ending at the coordinate with the greatest y-coordinate.
+        """
+        (min_coord, max_coord) = self.bounds()
+        return max_coord.y - min_coord.y + 1
+
+    def copy(self) -> "ChunkedSparseGrid[T]":
+        """Return a copy of the grid."""
+        result = ChunkedSparseGrid[T]()
+        result._tiles = {key: tile[:] for (key, tile) in self._tiles.items()}
+        result._coords = {key: coords[:] for (key, coords) in self._coords.items()}
+        result._counts = self._counts.copy()
+        result._len = self._len
+        result._bounds = self._bounds
+        result._face_counts = self._face_counts[:]
+        result._bounds_stale = self._bounds_stale
+        return result
+
+    @overload
+    def get(self, coord: Coord, default: U) -> T | U: ...
+
+    @overload
+    def get(self, coord: Coord) -> T | None: ...
+
+    def get(self, coord: Coord, default: object = None) -> object:
+        """Get the value at the given coordinate, or `None` if the coordinate is
+        not in the grid.
+        """
+        (key, index) = self._locate(coord)
+        tile = self._tiles.get(key)
+        if tile is None:
+            return default
+        value = tile[index]
+        return default if value is _EMPTY else value
+
+    def iter_cells(self) -> Iterable[tuple[Coord, T]]:
+        """Iterate over all coordinates and values in the grid, a tile at a
+        time.
+        """
+        for key, tile in self._tiles.items():
+            # Find the assigned cells without a Python-level loop over the
+            # whole tile.
+            assigned = list(map(operator.is_not, tile, itertools.repeat(_EMPTY)))
+            yield from zip(
+                itertools.compress(self._coords[key], assigned),  # type: ignore[arg-type]
+                itertools.compress(tile, assigned),  # type: ignore[arg-type]
+            )
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.tuples(
+                st.integers(-100, 100), st.integers(-100, 100), st.integers(-1, 1)
+            ),
+            st.one_of(st.none(), st.integers()),
+        )
+    )
+)
+def test_chunked_sparse_grid(
+    operations: list[tuple[tuple[int, int, int], int | None]],
+) -> None:
+    expected = SparseGrid[int]({})
+    grid = ChunkedSparseGrid[int]()
+    for position, value in operations:
+        coord = Coord.from_tuple(position)
+        if value is not None:
+            expected[coord] = value
+            grid[coord] = value
+        elif coord in expected:
+            del expected[coord]
+            del grid[coord]
+        assert len(grid) == len(expected)
+        if len(expected) > 0:
+            assert (grid.width(), grid.height()) == (
+                expected.width(),
+                expected.height(),
+            )
+            coords = [coord for (coord, _) in expected.iter_cells()]
+            assert grid.bounds() == (
+                Coord(
+                    min(c.x for c in coords),
+                    min(c.y for c in coords),
+                    min(c.z for c in coords),
+                ),
+                Coord(
+                    max(c.x for c in coords),
+                    max(c.y for c in coords),
+                    max(c.z for c in coords),
+                ),
+            )
+    assert dict(grid.iter_cells()) == dict(expected.iter_cells())
+    assert grid.copy() == grid
+
+
+def test_chunked_sparse_grid_keeps_bounds_on_interior_delete() -> None:
+    grid = ChunkedSparseGrid({Coord(x, y): x * y for x in range(10) for y in range(10)})
+    del grid[Coord(5, 5)]
+    del grid[Coord(0, 5)]
+    assert grid._bounds == (Coord(0, 0), Coord(9, 9))
+    for y in range(10):
+        del grid[Coord(9, y)]
+    assert grid._bounds is None
+    assert grid.bounds() == (Coord(0, 0), Coord(8, 9))
+    del grid[Coord(8, 4)]
+    assert grid._bounds == (Coord(0, 0), Coord(8, 9))
+
+
+class BitGrid:
+    r"""An unbounded set of coordinates, such as occupied or visited cells,
+    stored as one Python int per row, where bit `i` of row `(y, z)` is the
+    cell at `x = origin_x + i`. The origin starts at the leftmost cell and
+    moves left as needed, and rows grow to the right by themselves, so the
+    rows only span the cells' x-coordinates, wherever they are.
+
+    Whole-grid operations (`shifted`, `&`, `|`, `-`, `^` and `len`) work on a
+    row at a time rather than a cell at a time. For example, this finds the
+    cells which have any neighbor, then keeps only those with none to the
+    north, in the style of an elf-spreading puzzle:
+
+    >>> elves = BitGrid.from_str("##..\n.#..\n...#")
+    >>> crowded = elves & elves.any_neighbors(Deltas2d.ALL)
+    >>> crowded
+    ##
+    .#
+    >>> crowded - crowded.any_neighbors([Deltas2d.NORTH, Deltas2d.NORTHEAST, Deltas2d.NORTHWEST])
+    ##
+    >>> len(elves), Coord(3, 2) in elves, elves.bounds()
+    (4, True, (Coord(x=0, y=0, z=0), Coord(x=3, y=2, z=0)))
+    >>> elves.shifted(Delta(-5, 0, 1)).bounds()
+    (Coord(x=-5, y=0, z=1), Coord(x=-2, y=2, z=1))
+    """
+
+    __slots__ = ("_rows", "_origin_x")
+
+    def __init__(self, coords: Iterable[Coord] = ()) -> None:
+        coords = list(coords)
+        self._rows: dict[tuple[int, int], int] = {}
+        # Start at the leftmost coordinate, so that `add` never has to move
+        # the origin.
+        self._origin_x = min((coord.x for coord in coords), default=0)
+        for coord in coords:
+            self.add(coord)
+
+    @classmethod
+    def from_str(cls, s: str, *, on: str = "#") -> BitGrid:
+        """Parse a 2D grid, in which the cells equal to `on` are set."""
+        rows = {}
+        lines = s.strip().splitlines()
+        for y, line in enumerate(lines):
+            row = 0
+            for x, char in enumerate(line):
+                if char == on:
+                    row |= 1 << x
+            if row:
+                rows[(y, 0)] = row
+        return cls()._with_rows(rows, 0)
+
+    def _with_rows(self, rows: dict[tuple[int, int], int], origin_x: int) -> BitGrid:
+        """Make a grid with the given rows, moving the origin right to the
+        leftmost set cell so that the rows don't start with unused bits."""
+        if rows:
+            shift = min((row & -row).bit_length() for row in rows.values()) - 1
+            if shift:
+                rows = {key: row >> shift for (key, row) in rows.items()}
+                origin_x += shift
+        result = BitGrid()
+        result._rows = rows
+        result._origin_x = origin_x
+        return result
+
+    def __repr__(self) -> str:
+        """Dump the set cells as `#` within the bounds, with the top layer
+        first."""
+        if not self._rows:
+            return ""
+        (min_coord, max_coord) = self.bounds()
+        layers = []
+        for z in range(min_coord.z, max_coord.z + 1):
+            lines = []
+            for y in range(min_coord.y, max_coord.y + 1):
+                row = self._rows.get((y, z), 0) >> (min_coord.x - self._origin_x)
+                lines.append(
+                    "".join(
+                        "#" if row >> i & 1 else "."
+                        for i in range(max_coord.x - min_coord.x + 1)
+                    )
+                )
+            layers.append("\n".join(lines))
+        return "\n---\n".join(layers)
+
+    def __contains__(self, coord: Coord) -> bool:
+        i = coord.x - self._origin_x
+        return i >= 0 and self._rows.get((coord.y, coord.z), 0) >> i & 1 == 1
+
+    def __len__(self) -> int:
+        return sum(row.bit_count() for row in self._rows.values())
+
+    def __iter__(self) -> Iterator[Coord]:
+        """Iterate over the set cells, ordered by z, then y, then x."""
+        origin_x = self._origin_x
+        for (y, z), row in sorted(self._rows.items(), key=lambda item: item[0][::-1]):
+            while row:
+                low_bit = row & -row
+                yield Coord(origin_x + low_bit.bit_length() - 1, y, z)
+                row ^= low_bit
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitGrid):
+            return NotImplemented
+        return not (self ^ other)._rows
+
+    def copy(self) -> BitGrid:
+        return self._with_rows(self._rows.copy(), self._origin_x)
+
+    def add(self, coord: Coord) -> None:
+        if not self._rows:
+            self._origin_x = coord.x
+        i = coord.x - self._origin_x
+        if i < 0:
+            # Move the origin left, shifting every row to match.
+            self._rows = {key: row << -i for (key, row) in self._rows.items()}
+            self._origin_x = coord.x
+            i = 0
+        key = (coord.y, coord.z)
+        self._rows[key] = self._rows.get(key, 0) | 1 << i
+
+    def discard(self, coord: Coord) -> None:
+        i = coord.x - self._origin_x
+        key = (coord.y, coord.z)
+        row = self._rows.get(key, 0)
+        if i >= 0 and row >> i & 1:
+            row ^= 1 << i
+            if row:
+                self._rows[key] = row
+            else:
+                del self._rows[key]
+
+    def bounds(self) -> tuple[Coord, Coord]:
+        """Return the minimum and maximum coordinates of the set cells, in each
+        dimension. Raises `ValueError` if there are none."""
+        if not self._rows:
+            raise ValueError("bounds() of an empty BitGrid")
+        (min_y, max_y) = minmax(y for (y, _) in self._rows)
+        (min_z, max_z) = minmax(z for (_, z) in self._rows)
+        min_i = min((row & -row).bit_length() - 1 for row in self._rows.values())
+        max_i = max(row.bit_length() - 1 for row in self._rows.values())
+        return (
+            Coord(self._origin_x + min_i, min_y, min_z),
+            Coord(self._origin_x + max_i, max_y, max_z),
+        )
+
+    def shifted(self, delta: Delta) -> BitGrid:
+        """Return the grid with every cell moved by `delta`."""
+        return self._with_rows(
+            {(y + delta.y, z + delta.z): row for ((y, z), row) in self._rows.items()},
+            self._origin_x + delta.x,
+        )
+
+    def any_neighbors(self, deltas: Iterable[Delta]) -> BitGrid:
+        """Return the cells which have a set neighbor in any of the directions
+        given by `deltas`."""
+        result = BitGrid()
+        for delta in deltas:
+            result |= self.shifted(-delta)
+        return result
+
+    def _combine(self, other: BitGrid, op: Callable[[int, int], int]) -> BitGrid:
+        origin_x = min(self._origin_x, other._origin_x)
+        self_shift = self._origin_x - origin_x
+        other_shift = other._origin_x - origin_x
+        rows = {}
+        for key in self._rows.keys() | other._rows.keys():
+            row = op(
+                self._rows.get(key, 0) << self_shift,
+                other._rows.get(key, 0) << other_shift,
+            )
+            if row:
+                rows[key] = row
+        return self._with_rows(rows, origin_x)
+
+    def __and__(self, other: BitGrid) -> BitGrid:
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other: BitGrid) -> BitGrid:
+        return self._combine(other, operator.or_)
+
+    def __xor__(self, other: BitGrid) -> BitGrid:
+        return self._combine(other, operator.xor)
+
+    def __sub__(self, other: BitGrid) -> BitGrid:
+        """Return the cells which are set in this grid but not in `other`."""
+        return self._combine(other, lambda a, b: a & ~b)
+
+
+@given(
+    st.sets(st.tuples(st.integers(-4, 4), st.integers(-4, 4), st.integers(-1, 1))),
+    st.sets(st.tuples(st.integers(-4, 4), st.integers(-4, 4), st.integers(-1, 1))),
+    st.tuples(st.integers(-3, 3), st.integers(-3, 3), st.integers(-1, 1)),
+)
+def test_bit_grid(
+    a: set[tuple[int, int, int]],
+    b: set[tuple[int, int, int]],
+    delta: tuple[int, int, int],
+) -> None:
+    coords_a = {Coord.from_tuple(t) for t in a}
+    coords_b = {Coord.from_tuple(t) for t in b}
+    grid_a = BitGrid(coords_a)
+    grid_b = BitGrid(coords_b)
+    assert set(grid_a) == coords_a
+    assert len(grid_a) == len(coords_a)
+    assert set(grid_a & grid_b) == coords_a & coords_b
+    assert set(grid_a | grid_b) == coords_a | coords_b
+    assert set(grid_a ^ grid_b) == coords_a ^ coords_b
+    assert set(grid_a - grid_b) == coords_a - coords_b
+    assert (grid_a == grid_b) == (coords_a == coords_b)
+    shift = Delta.from_tuple(delta)
+    assert set(grid_a.shifted(shift)) == {coord + shift for coord in coords_a}
+    for coord in coords_b:
+        grid_a.discard(coord)
+    assert set(grid_a) == coords_a - coords_b
+
+
+def test_bit_grid_far_from_origin() -> None:
+    far = 10**8
+    grid = BitGrid([Coord(far + 1, 1), Coord(far, 0)])
+    grid.add(Coord(far + 2, 0))
+    grid.add(Coord(far - 1, 2))
+    assert set(grid) == {
+        Coord(far + 1, 1),
+        Coord(far, 0),
+        Coord(far + 2, 0),
+        Coord(far - 1, 2),
+    }
+    assert max(row.bit_length() for row in grid._rows.values()) <= 4
+    empty = BitGrid()
+    empty.add(Coord(-far, 0))
+    assert max(row.bit_length() for row in empty._rows.values()) == 1
+    shifted = BitGrid.from_str("...#").shifted(Delta(far, 0, 0))
+    assert list(shifted) == [Coord(far + 3, 0)]
+    assert (
+        max(
+            row.bit_length()
+            for row in (shifted & grid.shifted(Delta(3, 0, 0)))._rows.values()
+        )
+        == 1
+    )
+
+
 @dataclass(frozen=True, kw_only=True)
 class ShortestPathNode(Generic[T]):
     cost: int
@@ -1005,6 +3081,26 @@ class ConnectedComponents(Generic[T]):
 
 
 class FloodFill(ABC, Generic[T]):
+    r"""Generic flood-fill algorithm.
+
+    You should subclass this class and override the `get_neighbors` method.
+
+    Nodes can be anything hashable. For large grids, encoding coordinates as
+    ints with `DenseGrid.encode` is much faster than using `Coord`s:
+
+    >>> class FillOpen(FloodFill[int]):
+    ...     def __init__(self, grid: DenseGrid[str]) -> None:
+    ...         self.cells = grid.cells
+    ...         self.neighbors = grid.neighbor_indices(Deltas2d.CARDINAL)
+    ...
+    ...     def get_neighbors(self, node: int) -> Iterable[int]:
+    ...         cells = self.cells
+    ...         return [n for n in self.neighbors[node] if cells[n] == "."]
+    >>> grid = DenseGrid.from_str("..#\n.##\n#..")
+    >>> sorted(grid.decode(i).to_2d() for i in FillOpen(grid).run([0]))
+    [(0, 0), (0, 1), (1, 0)]
+    """
+
     @abstractmethod
     def get_neighbors(self, node: T) -> Iterable[T]:
         raise NotImplementedError()
@@ -1063,6 +3159,149 @@ class GridFloodFill(FloodFill[Coord], Generic[T]):
         return self.grid[node] == self.grid[neighbor]
 
 
+@dataclass(frozen=True, kw_only=True)
+class Generation(Generic[T]):
+    step: int
+    """The number of generations run so far, starting from 1."""
+
+    changes: Mapping[Coord, T]
+    """The new values of the cells which changed in this generation."""
+
+
+class CellularAutomaton(ABC, Generic[T]):
+    r"""Generic cellular automaton on a `DenseGrid`, which is updated in place.
+
+    You should subclass this class and override the `rule` method.
+
+    Every cell is updated simultaneously in each generation. After the first
+    generation, only the cells which changed and the cells which have them as
+    neighbors (in the directions given by `deltas`) are re-evaluated, so the
+    work per generation is proportional to the number of changes rather than
+    to the size of the grid. This means that `rule` must only depend on the
+    cell and its neighbors in those directions.
+
+    >>> class Erode(CellularAutomaton[str]):
+    ...     def rule(self, coord: Coord, value: str) -> str:
+    ...         if value == "#" and any(
+    ...             self.grid[neighbor] == "."
+    ...             for neighbor in self.grid.neighbors(coord, self.deltas)
+    ...         ):
+    ...             return "."
+    ...         return value
+    >>> automaton = Erode(DenseGrid.from_str(".....\n.###.\n.###.\n.###.\n....."))
+    >>> [len(generation.changes) for generation in automaton.run_generations()]
+    [8, 1]
+    >>> automaton.grid[Coord.from_2d(2, 2)]
+    '.'
+    >>> Erode(DenseGrid.from_str(".....\n.###.\n.###.\n.###.\n.....")).run(max_steps=1).counts()
+    Counter({'.': 24, '#': 1})
+    """
+
+    def __init__(self, grid: DenseGrid[T], deltas: Sequence[Delta] = Deltas2d.ALL):
+        self.grid = grid
+        self.deltas = deltas
+
+    @abstractmethod
+    def rule(self, coord: Coord, value: T) -> T:
+        """Return the next value of the cell at `coord`, which currently has
+        the value `value`. This should read the current values of its
+        neighbors from `self.grid`.
+
+        Should be overridden by the implementor.
+        """
+        raise NotImplementedError()
+
+    def run(self, *, max_steps: int | None = None) -> DenseGrid[T]:
+        """Run until no cells change, or for at most `max_steps` generations,
+        and return the grid."""
+        return run_generator(self.run_generations(max_steps=max_steps))
+
+    def run_generations(
+        self, *, max_steps: int | None = None
+    ) -> Generator[Generation[T], None, DenseGrid[T]]:
+        """Run until no cells change, or for at most `max_steps` generations,
+        while yielding the changes made in each generation."""
+        grid = self.grid
+        # Track cells by their encoded ints, which are cheaper to hash than
+        # `Coord`s, and only make `Coord`s to call `rule`.
+        cells = grid.cells
+        coords = list(grid.iter_coords())
+        # The cells whose rule reads cell `i` are the ones which have `i` as a
+        # neighbor, i.e. the neighbors of `i` in the opposite directions.
+        dependents = grid.neighbor_indices([-delta for delta in self.deltas])
+        rule = self.rule
+        dirty: Iterable[int] = range(len(coords))
+        step = 0
+        while max_steps is None or step < max_steps:
+            changes = {}
+            for i in dirty:
+                value = cells[i]
+                new_value = rule(coords[i], value)
+                if new_value != value:
+                    changes[i] = new_value
+            if not changes:
+                break
+            grid._set_cells(changes)
+            step += 1
+            yield Generation(
+                step=step,
+                changes={coords[i]: new_value for (i, new_value) in changes.items()},
+            )
+
+            next_dirty = set(changes)
+            for i in changes:
+                next_dirty.update(dependents[i])
+            dirty = next_dirty
+        return grid
+
+
+class _CountNeighbors(CellularAutomaton[str]):
+    """Turns a cell on if exactly one of its neighbors is on, and off
+    otherwise, for testing."""
+
+    def rule(self, coord: Coord, value: str) -> str:
+        return _count_neighbors_rule(self.grid, coord, self.deltas)
+
+
+def _count_neighbors_rule(
+    grid: DenseGrid[str], coord: Coord, deltas: Iterable[Delta]
+) -> str:
+    on = sum(grid[neighbor] == "#" for neighbor in grid.neighbors(coord, deltas))
+    return "#" if on == 1 else "."
+
+
+def test_cellular_automaton_spreads_with_asymmetric_deltas() -> None:
+    class SpreadEast(CellularAutomaton[str]):
+        def rule(self, coord: Coord, value: str) -> str:
+            west = coord + Deltas2d.WEST
+            return ">" if west in self.grid and self.grid[west] == ">" else value
+
+    automaton = SpreadEast(DenseGrid.from_str(">....."), deltas=[Deltas2d.WEST])
+    assert str(automaton.run()) == ">>>>>>"
+
+
+@given(
+    st.lists(
+        st.lists(st.sampled_from(".#"), min_size=4, max_size=4), min_size=1, max_size=4
+    ),
+    st.lists(st.sampled_from(Deltas2d.ALL), min_size=1, max_size=4, unique=True),
+)
+def test_cellular_automaton_matches_full_rescan(
+    rows: list[list[str]], deltas: list[Delta]
+) -> None:
+    grid = DenseGrid.from_2d(rows)
+    expected = grid.copy()
+    for generation in _CountNeighbors(grid, deltas).run_generations(max_steps=6):
+        changes = {
+            coord: new_value
+            for (coord, value) in expected.iter_cells()
+            if (new_value := _count_neighbors_rule(expected, coord, deltas)) != value
+        }
+        expected.update(changes)
+        assert generation.changes == changes
+    assert grid == expected
+
+
 def first_completed_generator(generators: list[Generator[T, None, U]]) -> U:
     """Run the given generators in parallel, returning the first one that
     completes.
@@ -0,0 +1,159 @@
+"""Locate and load the puzzle inputs for every year at once.
+
+Inputs live next to each day's code, as `yearNNNN/dayNN/input`, except in
+year2020, which uses `year2020/dayN/input.txt`.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+INPUT_NAMES = ["input", "input.txt"]
+"""The file names an input may have, in order of preference."""
+
+_YEAR_DIR_RE = re.compile(r"year(\d+)")
+_DAY_DIR_RE = re.compile(r"day(\d+)")
+
+InputKey = tuple[int, int]
+"""A year and day."""
+
+
+def find_input(day_dir: Path) -> Path | None:
+    """Return the path of the input in the given day directory, if any.
+
+    >>> find_input(REPO_ROOT / "year2020" / "day1").name
+    'input.txt'
+    >>> find_input(REPO_ROOT / "year2025")
+    """
+    for name in INPUT_NAMES:
+        path = day_dir / name
+        if path.is_file():
+            return path
+    return None
+
+
+def discover_inputs(
+    root: Path = REPO_ROOT, years: Iterable[int] | None = None
+) -> dict[InputKey, Path]:
+    """Find the inputs for every day of the given years (or all years),
+    ordered by year and day.
+
+    >>> inputs = discover_inputs(years=[2020, 2025])
+    >>> inputs[(2020, 1)].relative_to(REPO_ROOT).as_posix()
+    'year2020/day1/input.txt'
+    >>> inputs[(2025, 1)].relative_to(REPO_ROOT).as_posix()
+    'year2025/day01/input'
+    """
+    year_filter = None if years is None else set(years)
+    result = {}
+    for year_dir in root.iterdir():
+        year_match = _YEAR_DIR_RE.fullmatch(year_dir.name)
+        if year_match is None or not year_dir.is_dir():
+            continue
+        year = int(year_match.group(1))
+        if year_filter is not None and year not in year_filter:
+            continue
+        for day_dir in year_dir.iterdir():
+            day_match = _DAY_DIR_RE.fullmatch(day_dir.name)
+            if day_match is None:
+                continue
+            path = find_input(day_dir)
+            if path is not None:
+                result[(year, int(day_match.group(1)))] = path
+    return dict(sorted(result.items()))
+
+
+class InputStore:
+    """All of the puzzle inputs, read into a single buffer up front.
+
+    `data` returns a zero-copy view into the buffer. `text` decodes the input
+    once and then returns the same `str` each time, since `parse_input` needs
+    a `str` and Python can't make one without copying.
+
+    >>> store = InputStore.load(years=[2025])
+    >>> (2025, 1) in store
+    True
+    >>> store.text(2025, 1) is store.text(2025, 1)
+    True
+    >>> bytes(store.data(2025, 1)) == store.path(2025, 1).read_bytes()
+    True
+    >>> store.text(2025, 99)
+    Traceback (most recent call last):
+    ...
+    KeyError: (2025, 99)
+    """
+
+    def __init__(self, paths: dict[InputKey, Path]) -> None:
+        self._paths = paths
+        self._offsets: dict[InputKey, tuple[int, int]] = {}
+        total_size = 0
+        sizes = {}
+        for key, path in paths.items():
+            sizes[key] = path.stat().st_size
+            total_size += sizes[key]
+        self._buffer = bytearray(total_size)
+        view = memoryview(self._buffer)
+        offset = 0
+        for key, path in paths.items():
+            with path.open("rb", buffering=0) as f:
+                num_read = f.readinto(view[offset : offset + sizes[key]])
+            self._offsets[key] = (offset, offset + num_read)
+            offset += num_read
+        self._view = view[:offset].toreadonly()
+        self._texts: dict[InputKey, str] = {}
+
+    @classmethod
+    def load(
+        cls, root: Path = REPO_ROOT, years: Iterable[int] | None = None
+    ) -> InputStore:
+        return cls(discover_inputs(root, years))
+
+    def __contains__(self, key: InputKey) -> bool:
+        return key in self._paths
+
+    def __iter__(self) -> Iterator[InputKey]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def path(self, year: int, day: int) -> Path:
+        return self._paths[(year, day)]
+
+    def data(self, year: int, day: int) -> memoryview:
+        (start, end) = self._offsets[(year, day)]
+        return self._view[start:end]
+
+    def text(self, year: int, day: int) -> str:
+        key = (year, day)
+        text = self._texts.get(key)
+        if text is None:
+            text = str(self.data(year, day), "utf-8")
+            self._texts[key] = text
+        return text
+
+
+def test_input_store(tmp_path: Path) -> None:
+    for relative_path, contents in [
+        ("year2020/day3/input.txt", "a\n"),
+        ("year2024/day03/input", "bb\n"),
+        ("year2024/day04/input", ""),
+        ("year2024/day05/__init__.py", ""),
+        ("year2024/utils/input", "not an input\n"),
+    ]:
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+    (tmp_path / "year2024" / "day06").mkdir()
+
+    store = InputStore.load(tmp_path)
+    assert list(store) == [(2020, 3), (2024, 3), (2024, 4)]
+    assert store.text(2020, 3) == "a\n"
+    assert store.text(2024, 3) == "bb\n"
+    assert store.text(2024, 4) == ""
+    assert (2024, 5) not in store
+    assert list(InputStore.load(tmp_path, years=[2024])) == [(2024, 3), (2024, 4)]
@@ -0,0 +1,356 @@
+"""Particles moving with constant velocities on a wrapping 2D grid.
+
+The positions and velocities are stored as parallel arrays of ints, and the
+positions at any time are computed directly as `(p + v * t) % size`, using
+`map` over C-level `operator` functions rather than a Python-level loop or an
+object per particle.
+"""
+
+from __future__ import annotations
+
+import array
+import itertools
+import math
+import operator
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from ._parse import extract_int_list
+
+_EXAMPLE = """
+p=0,4 v=3,-3
+p=6,3 v=-1,-3
+p=10,3 v=-1,2
+p=2,0 v=2,-1
+p=0,0 v=1,3
+p=3,0 v=-2,-2
+p=7,6 v=-1,-3
+p=3,0 v=-1,-2
+p=9,3 v=2,3
+p=7,3 v=-1,2
+p=2,4 v=2,-3
+p=9,5 v=-3,-3
+"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParticleStats:
+    """Statistics of the particles' positions at one time, from
+    `Particles.stats`."""
+
+    t: int
+
+    quadrant_counts: tuple[int, int, int, int]
+    """The number of particles in the top-left, top-right, bottom-left and
+    bottom-right quadrants, not counting those on the middle row or column."""
+
+    bounding_box_area: int
+
+    variance: tuple[float, float]
+    """The variance of the x- and y-coordinates."""
+
+    clustering: int
+    """The number of particles with another particle directly above, below,
+    left or right of them. A picture formed by the particles scores much
+    higher than random noise."""
+
+
+class Particles:
+    """Particles with integer positions and velocities on a `width` by
+    `height` grid whose edges wrap around.
+
+    >>> particles = Particles.from_str(_EXAMPLE, width=11, height=7)
+    >>> len(particles)
+    12
+    >>> stats = particles.stats([100])[0]
+    >>> stats.quadrant_counts, math.prod(stats.quadrant_counts)
+    ((1, 3, 4, 1), 12)
+    >>> particles.positions_at(5)[:2]
+    [(4, 3), (1, 2)]
+    """
+
+    __slots__ = ("xs", "ys", "vxs", "vys", "width", "height")
+
+    def __init__(
+        self,
+        positions: Iterable[tuple[int, int]],
+        velocities: Iterable[tuple[int, int]],
+        *,
+        width: int,
+        height: int,
+    ) -> None:
+        positions = list(positions)
+        velocities = list(velocities)
+        if len(positions) != len(velocities):
+            raise ValueError(
+                f"Got {len(positions)} positions but {len(velocities)} velocities"
+            )
+        self.xs = array.array("q", (x for (x, _) in positions))
+        self.ys = array.array("q", (y for (_, y) in positions))
+        self.vxs = array.array("q", (vx for (vx, _) in velocities))
+        self.vys = array.array("q", (vy for (_, vy) in velocities))
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_str(cls, input: str, *, width: int, height: int) -> Particles:
+        """Parse lines of the form `p=X,Y v=VX,VY` (or anything else with four
+        ints per line)."""
+        values = extract_int_list(input)
+        if len(values) % 4 != 0:
+            raise ValueError(f"Expected 4 ints per particle, but got {len(values)}")
+        return cls(
+            list(zip(values[0::4], values[1::4])),
+            list(zip(values[2::4], values[3::4])),
+            width=width,
+            height=height,
+        )
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def xs_at(self, t: int) -> list[int]:
+        """The x-coordinates of the particles at time `t`."""
+        return _wrap(self.xs, self.vxs, t, self.width)
+
+    def ys_at(self, t: int) -> list[int]:
+        """The y-coordinates of the particles at time `t`."""
+        return _wrap(self.ys, self.vys, t, self.height)
+
+    def positions_at(self, t: int) -> list[tuple[int, int]]:
+        """The positions of the particles at time `t`."""
+        return list(zip(self.xs_at(t), self.ys_at(t)))
+
+    def stats(self, ts: Iterable[int]) -> list[ParticleStats]:
+        """Compute statistics of the particles' positions at each of the given
+        times.
+
+        The positions are computed once per time and numbered as cells, and
+        all of the statistics are computed from those with `map` over C-level
+        functions and reductions (`list.count`, `min`, `max`, `sum`) rather
+        than a Python-level loop over the particles.
+        """
+        width = self.width
+        mid_x = width // 2
+        mid_y = self.height // 2
+        # Cells are numbered `x + (y + 1) * stride`, with a spare column and
+        # rows around the grid so that the cells next to it aren't numbered
+        # like cells in it.
+        stride = width + 1
+        row_starts = [(y + 1) * stride for y in range(self.height)]
+        # The index of each cell's quadrant in `quadrant_counts`, or 4 for the
+        # middle row and column and the spare cells.
+        quadrants = [4] * stride
+        for y in range(self.height):
+            (left, right) = (4, 4) if y == mid_y else (0, 1) if y < mid_y else (2, 3)
+            quadrants += [left] * mid_x + [4] + [right] * (width - mid_x - 1) + [4]
+        quadrants += [4] * stride
+
+        result = []
+        for t in ts:
+            xs = self.xs_at(t)
+            ys = self.ys_at(t)
+            cells = list(map(operator.add, xs, map(row_starts.__getitem__, ys)))
+            cell_quadrants = list(map(quadrants.__getitem__, cells))
+            # Find the cells with a neighbor to the east or south, and then
+            # add those neighbors.
+            occupied = set(cells)
+            west_of_pair = occupied.intersection(
+                map(operator.sub, occupied, itertools.repeat(1))
+            )
+            north_of_pair = occupied.intersection(
+                map(operator.sub, occupied, itertools.repeat(stride))
+            )
+            with_neighbor = west_of_pair | north_of_pair
+            with_neighbor.update(map(operator.add, west_of_pair, itertools.repeat(1)))
+            with_neighbor.update(
+                map(operator.add, north_of_pair, itertools.repeat(stride))
+            )
+            result.append(
+                ParticleStats(
+                    t=t,
+                    quadrant_counts=(
+                        cell_quadrants.count(0),
+                        cell_quadrants.count(1),
+                        cell_quadrants.count(2),
+                        cell_quadrants.count(3),
+                    ),
+                    bounding_box_area=(
+                        (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1) if xs else 0
+                    ),
+                    variance=(_variance(xs), _variance(ys)),
+                    clustering=list(map(with_neighbor.__contains__, cells)).count(True),
+                )
+            )
+        return result
+
+    def min_variance_time(self) -> int:
+        """Return the earliest time at which both the x- and y-coordinates of
+        the particles have their minimum variance.
+
+        The x-coordinates repeat every `width` steps and the y-coordinates
+        every `height` steps, so this finds the best time modulo each of them
+        separately (`width + height` evaluations of one coordinate), and then
+        combines them with the Chinese remainder theorem (taking the earliest
+        combination if several times tie for the minimum).
+
+        >>> particles = Particles(
+        ...     [(1, 0), (3, 0), (0, 1), (2, 4)], [(1, 2), (-1, 3), (2, 0), (0, 1)], width=5, height=7
+        ... )
+        >>> t = particles.min_variance_time()
+        >>> t, sorted(particles.positions_at(t))
+        (26, [(2, 1), (2, 1), (2, 2), (2, 3)])
+        """
+        best_xs = _argmins(_scaled_variance(self.xs_at(t)) for t in range(self.width))
+        best_ys = _argmins(_scaled_variance(self.ys_at(t)) for t in range(self.height))
+        result = None
+        for best_x, best_y in itertools.product(best_xs, best_ys):
+            try:
+                t = _crt(best_x, self.width, best_y, self.height)
+            except ValueError:
+                # Only possible if the width and height aren't coprime.
+                continue
+            if result is None or t < result:
+                result = t
+        if result is None:
+            raise ValueError("The x- and y-variances are never minimal together")
+        return result
+
+
+def _wrap(
+    positions: Sequence[int], velocities: Sequence[int], t: int, size: int
+) -> list[int]:
+    # `(p + v * t) % size`, without a Python-level loop.
+    return list(
+        map(
+            operator.mod,
+            map(
+                operator.add,
+                positions,
+                map(operator.mul, velocities, itertools.repeat(t)),
+            ),
+            itertools.repeat(size),
+        )
+    )
+
+
+def _argmins(values: Iterable[int]) -> list[int]:
+    """Return the indices of all of the smallest values.
+
+    >>> _argmins([3, 1, 2, 1])
+    [1, 3]
+    """
+    values = list(values)
+    least = min(values)
+    return [i for (i, value) in enumerate(values) if value == least]
+
+
+def _scaled_variance(values: Sequence[int]) -> int:
+    """The variance of the values, multiplied by `len(values) ** 2`, which is
+    an int and so can be compared exactly."""
+    return len(values) * sum(map(operator.mul, values, values)) - sum(values) ** 2
+
+
+def _variance(values: Sequence[int]) -> float:
+    return _scaled_variance(values) / len(values) ** 2 if values else 0.0
+
+
+def _crt(a: int, m: int, b: int, n: int) -> int:
+    """Return the least non-negative `t` with `t % m == a % m` and
+    `t % n == b % n`, or raise `ValueError` if there is none.
+
+    >>> _crt(2, 3, 3, 5)
+    8
+    >>> _crt(1, 4, 3, 6)
+    9
+    """
+    g = math.gcd(m, n)
+    if (b - a) % g != 0:
+        raise ValueError(f"No t with t = {a} (mod {m}) and t = {b} (mod {n})")
+    lcm = m // g * n
+    k = (b - a) // g * pow(m // g, -1, n // g) % (n // g)
+    return (a + m * k) % lcm
+
+
+@given(
+    st.integers(0, 50),
+    st.integers(1, 20),
+    st.integers(0, 50),
+    st.integers(1, 20),
+)
+def test_crt(a: int, m: int, b: int, n: int) -> None:
+    try:
+        t = _crt(a, m, b, n)
+    except ValueError:
+        assert not any(t % m == a % m and t % n == b % n for t in range(math.lcm(m, n)))
+    else:
+        assert t == min(
+            t for t in range(math.lcm(m, n)) if t % m == a % m and t % n == b % n
+        )
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.integers(0, 6), st.integers(0, 4), st.integers(-9, 9), st.integers(-9, 9)
+        ),
+        max_size=20,
+    ),
+    st.integers(0, 50),
+)
+def test_stats(values: list[tuple[int, int, int, int]], t: int) -> None:
+    particles = Particles(
+        [(x, y) for (x, y, _, _) in values],
+        [(vx, vy) for (_, _, vx, vy) in values],
+        width=7,
+        height=5,
+    )
+    positions = particles.positions_at(t)
+    quadrants = [0, 0, 0, 0]
+    for x, y in positions:
+        if x != 3 and y != 2:
+            quadrants[(x > 3) + 2 * (y > 2)] += 1
+    occupied = set(positions)
+    stats = particles.stats([t])[0]
+    assert list(stats.quadrant_counts) == quadrants
+    assert stats.clustering == sum(
+        1
+        for (x, y) in positions
+        if {(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)} & occupied
+    )
+    if positions:
+        xs = [x for (x, _) in positions]
+        ys = [y for (_, y) in positions]
+        assert stats.bounding_box_area == (max(xs) - min(xs) + 1) * (
+            max(ys) - min(ys) + 1
+        )
+
+
+@given(
+    st.lists(
+        st.tuples(
+            st.integers(0, 6), st.integers(0, 4), st.integers(-9, 9), st.integers(-9, 9)
+        ),
+        min_size=1,
+        max_size=6,
+    )
+)
+def test_min_variance_time(values: list[tuple[int, int, int, int]]) -> None:
+    particles = Particles(
+        [(x, y) for (x, y, _, _) in values],
+        [(vx, vy) for (_, _, vx, vy) in values],
+        width=7,
+        height=5,
+    )
+    variances = [
+        (_scaled_variance(particles.xs_at(t)), _scaled_variance(particles.ys_at(t)))
+        for t in range(35)
+    ]
+    best = (min(x for (x, _) in variances), min(y for (_, y) in variances))
+    assert particles.min_variance_time() == variances.index(best)
+    assert particles.positions_at(3) == [
+        ((x + vx * 3) % 7, (y + vy * 3) % 5) for (x, y, vx, vy) in values
+    ]
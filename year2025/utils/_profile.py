@@ -0,0 +1,410 @@
+"""Profilers for individual phases of a solution, used by `Solution.main`.
+
+For example, `python -m year2025.day08 --profile-format=speedscope` writes a
+flame graph for each phase to `.cache/profiles/`, which can be viewed at
+https://www.speedscope.app/.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import linecache
+import pstats
+import signal
+import sys
+import threading
+import tracemalloc
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from pathlib import Path
+from types import FrameType
+from typing import Literal, TypeVar
+
+import pytest
+
+T = TypeVar("T")
+
+ProfileFormat = Literal["pstats", "speedscope", "collapsed"]
+PROFILE_FORMATS: list[ProfileFormat] = ["pstats", "speedscope", "collapsed"]
+
+_FILE_SUFFIXES: dict[ProfileFormat, str] = {
+    "pstats": ".prof",
+    "speedscope": ".speedscope.json",
+    "collapsed": ".collapsed.txt",
+}
+
+SAMPLE_INTERVAL = 0.001
+"""The CPU time between samples taken by `SamplingProfiler`, in seconds."""
+
+PEAK_CHECK_INTERVAL = 0.005
+"""The wall-clock time between checks of the traced memory by
+`PeakSnapshotter`, in seconds."""
+
+Frame = tuple[str, str, int]
+"""A function name, file name and first line number."""
+
+Stack = tuple[Frame, ...]
+"""Frames from the outermost to the innermost."""
+
+
+class SamplingProfiler:
+    """Record the Python stack of the main thread every `interval` seconds of
+    CPU time, in the style of py-spy.
+
+    Unlike `cProfile`, this doesn't slow down every function call, so the
+    proportions of time spent in small, hot functions (such as `Coord.__add__`)
+    aren't distorted. It relies on `SIGPROF`, so it only works on Unix.
+
+    >>> def spin() -> None:
+    ...     total = 0
+    ...     for i in range(2_000_000):
+    ...         total += i
+    >>> profiler = SamplingProfiler()
+    >>> with profiler:
+    ...     spin()
+    >>> any(stack[-1][0] == "spin" for stack in profiler.samples)
+    True
+    """
+
+    def __init__(self, *, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: collections.Counter[Stack] = collections.Counter()
+
+    def _handle_signal(self, signum: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        # Drop the frames of `__enter__`'s caller and above, which are the
+        # same for every sample.
+        outer = self._outer_depth
+        self.samples[tuple(reversed(stack[: len(stack) - outer]))] += 1
+
+    def __enter__(self) -> SamplingProfiler:
+        frame: FrameType | None = sys._getframe(1)
+        self._outer_depth = 0
+        while frame is not None:
+            self._outer_depth += 1
+            frame = frame.f_back
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle_signal)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+
+
+def format_collapsed(samples: Mapping[Stack, int]) -> str:
+    """Format samples as collapsed stacks, as used by Brendan Gregg's
+    `flamegraph.pl` and accepted by speedscope.
+
+    >>> print(format_collapsed({
+    ...     (("main", "a.py", 1), ("f", "a.py", 5)): 3,
+    ...     (("main", "a.py", 1),): 1,
+    ... }))
+    main (a.py:1);f (a.py:5) 3
+    main (a.py:1) 1
+    """
+    return "\n".join(
+        ";".join(f"{name} ({file}:{line})" for (name, file, line) in stack)
+        + f" {count}"
+        for (stack, count) in samples.items()
+        if stack
+    )
+
+
+def format_speedscope(
+    samples: Mapping[Stack, int], *, name: str, interval: float = SAMPLE_INTERVAL
+) -> str:
+    """Format samples in speedscope's file format.
+
+    >>> document = json.loads(format_speedscope(
+    ...     {(("main", "a.py", 1), ("f", "a.py", 5)): 3}, name="part1", interval=0.5,
+    ... ))
+    >>> document["shared"]["frames"]
+    [{'name': 'main', 'file': 'a.py', 'line': 1}, {'name': 'f', 'file': 'a.py', 'line': 5}]
+    >>> profile = document["profiles"][0]
+    >>> (profile["samples"], profile["weights"], profile["endValue"])
+    ([[0, 1]], [1.5], 1.5)
+    """
+    frame_indices: dict[Frame, int] = {}
+    stack_indices = []
+    weights = []
+    for stack, count in samples.items():
+        if not stack:
+            continue
+        stack_indices.append(
+            [frame_indices.setdefault(frame, len(frame_indices)) for frame in stack]
+        )
+        weights.append(count * interval)
+    return json.dumps(
+        {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {
+                "frames": [
+                    {"name": name, "file": file, "line": line}
+                    for (name, file, line) in frame_indices
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": stack_indices,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "exporter": "year2025.utils",
+        }
+    )
+
+
+class PeakSnapshotter:
+    """Take a `tracemalloc` snapshot whenever the traced memory reaches a new
+    high, checking it every `interval` seconds from a background thread.
+
+    A snapshot taken when a phase ends only shows the memory that's still
+    live then, which misses temporary data (such as `Coord`s and tuples built
+    up in a search) that was freed before the end. The snapshot near the peak
+    shows it. To limit the cost of taking snapshots, a new one is only taken
+    once the traced memory has grown by `growth` times since the last one.
+
+    >>> import time
+    >>> tracemalloc.start()
+    >>> with PeakSnapshotter() as snapshotter:
+    ...     data = [str(i) for i in range(100_000)]
+    ...     time.sleep(0.05)
+    ...     del data
+    >>> tracemalloc.stop()
+    >>> snapshotter.snapshot is not None and snapshotter.memory > 1024 * 1024
+    True
+    """
+
+    def __init__(
+        self, *, interval: float = PEAK_CHECK_INTERVAL, growth: float = 1.1
+    ) -> None:
+        self.interval = interval
+        self.growth = growth
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.memory = 0
+        """The traced memory when `snapshot` was taken, in bytes."""
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        (baseline, _) = tracemalloc.get_traced_memory()
+        threshold = baseline * self.growth
+        while not self._stopped.wait(self.interval):
+            (current, _) = tracemalloc.get_traced_memory()
+            if current > threshold:
+                self.snapshot = tracemalloc.take_snapshot()
+                self.memory = current
+                threshold = current * self.growth
+
+    def __enter__(self) -> PeakSnapshotter:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        """Stop checking the traced memory. This can be called more than
+        once."""
+        self._stopped.set()
+        self._thread.join()
+
+
+def format_allocations(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, *, limit: int = 10
+) -> str:
+    """Format the `limit` source lines which allocated the most memory between
+    the two snapshots and which was still allocated at the second."""
+    filters = [
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+        tracemalloc.Filter(False, threading.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]
+    diffs = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno"
+    )
+    lines = []
+    for diff in diffs[:limit]:
+        frame = diff.traceback[0]
+        lines.append(
+            f"{diff.size_diff / 1024:>12,.1f} KiB {diff.count_diff:>10,} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+        source = linecache.getline(frame.filename, frame.lineno).strip()
+        if source:
+            lines.append(f"{'':>36}{source}")
+    return "\n".join(lines)
+
+
+def profile_path(output_dir: Path, *, name: str, format: ProfileFormat) -> Path:
+    """
+    >>> profile_path(Path("profiles"), name="2025-08-part1", format="speedscope")
+    PosixPath('profiles/2025-08-part1.speedscope.json')
+    """
+    return output_dir / f"{name}{_FILE_SUFFIXES[format]}"
+
+
+def profile_call(
+    f: Callable[[], T],
+    *,
+    name: str,
+    format: ProfileFormat | None,
+    output_dir: Path,
+    trace_malloc: bool = False,
+    num_stats: int = 25,
+) -> T:
+    """Call `f`, profiling it in the given format (if any) and writing the
+    profile to a file in `output_dir` named after `name`. A summary is printed
+    to stderr.
+
+    For `pstats`, the `num_stats` functions with the most cumulative time are
+    printed. If `trace_malloc` is set, the `num_stats` source lines that held
+    the most memory near its peak (as sampled by `PeakSnapshotter`) are
+    printed too, along with those holding the most memory that was still live
+    when `f` returned.
+    """
+    with contextlib.ExitStack() as stack:
+        if trace_malloc:
+            stack.enter_context(_tracing_malloc())
+            before = tracemalloc.take_snapshot()
+            snapshotter = stack.enter_context(PeakSnapshotter())
+
+        if format is None:
+            result = f()
+        elif format == "pstats":
+            profile = cProfile.Profile()
+            result = profile.runcall(f)
+            path = _write_profile(output_dir, name=name, format=format, contents=None)
+            profile.dump_stats(path)
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(num_stats)
+            print(stream.getvalue().rstrip(), file=sys.stderr)
+        else:
+            with SamplingProfiler() as sampler:
+                result = f()
+            contents = (
+                format_collapsed(sampler.samples)
+                if format == "collapsed"
+                else format_speedscope(sampler.samples, name=name)
+            )
+            path = _write_profile(
+                output_dir, name=name, format=format, contents=contents
+            )
+            print(
+                f"{name}: {sampler.samples.total():,} samples written to {path}",
+                file=sys.stderr,
+            )
+
+        if trace_malloc:
+            snapshotter.stop()
+            after = tracemalloc.take_snapshot()
+            (current, peak) = tracemalloc.get_traced_memory()
+            if snapshotter.snapshot is not None and snapshotter.memory > current:
+                print(
+                    f"{name}: top allocation sites at {snapshotter.memory / 1024:,.1f} KiB "
+                    + f"(sampled; peak {peak / 1024:,.1f} KiB):",
+                    file=sys.stderr,
+                )
+                print(
+                    format_allocations(before, snapshotter.snapshot, limit=num_stats),
+                    file=sys.stderr,
+                )
+            print(
+                f"{name}: top allocation sites still live at the end (peak {peak / 1024:,.1f} KiB):",
+                file=sys.stderr,
+            )
+            print(format_allocations(before, after, limit=num_stats), file=sys.stderr)
+    return result
+
+
+@contextlib.contextmanager
+def _tracing_malloc() -> Iterator[None]:
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _write_profile(
+    output_dir: Path, *, name: str, format: ProfileFormat, contents: str | None
+) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = profile_path(output_dir, name=name, format=format)
+    if contents is not None:
+        path.write_text(contents + "\n")
+    return path
+
+
+def test_profile_call(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    def work() -> list[int]:
+        return [i * i for i in range(200_000)]
+
+    formats: Sequence[ProfileFormat] = PROFILE_FORMATS
+    for format in formats:
+        result = profile_call(
+            work, name=f"test-{format}", format=format, output_dir=tmp_path
+        )
+        assert len(result) == 200_000
+        assert profile_path(tmp_path, name=f"test-{format}", format=format).exists()
+
+    stats = pstats.Stats(
+        str(profile_path(tmp_path, name="test-pstats", format="pstats"))
+    )
+    assert any(function == "work" for (_, _, function) in stats.stats)  # type: ignore[attr-defined]
+
+    capsys.readouterr()
+    assert (
+        profile_call(
+            work, name="test", format=None, output_dir=tmp_path, trace_malloc=True
+        )
+        == work()
+    )
+    assert "test: top allocation sites still live" in capsys.readouterr().err
+    assert not tracemalloc.is_tracing()
+
+    # Compiled under its own file name, since allocations in this file are
+    # filtered out of the report.
+    namespace: dict[str, Callable[[], int]] = {}
+    exec(
+        compile(
+            "def churn():\n"
+            + "    strings = [str(i) for i in range(200_000)]\n"
+            + "    __import__('time').sleep(0.05)\n"
+            + "    return len(strings)\n",
+            "<churn>",
+            "exec",
+        ),
+        namespace,
+    )
+    profile_call(
+        namespace["churn"],
+        name="test",
+        format=None,
+        output_dir=tmp_path,
+        trace_malloc=True,
+    )
+    (at_peak, at_end) = capsys.readouterr().err.split("still live at the end")
+    assert "<churn>:2" in at_peak
+    assert "<churn>:2" not in at_end
@@ -1,17 +1,499 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import hashlib
 import inspect
+import json
 import logging
+import os
+import pickle
 import re
-import subprocess
+import resource
+import signal
+import sqlite3
+import sys
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Self
+from types import FrameType
+from typing import Self, TypeVar, cast
+
+import pytest
+
+from ._inputs import INPUT_NAMES, InputStore, find_input
+from ._profile import PROFILE_FORMATS, ProfileFormat, profile_call
+from .fetch import (
+    SESSION_PATH,
+    FetchError,
+    MissingInput,
+    fetch_inputs,
+    read_base_url,
+    read_session,
+)
+
+T = TypeVar("T")
+S = TypeVar("S", bound="Solution")
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache"
+"""Directory for files generated while running solutions, which are not
+checked in."""
+
+PROFILE_DIR = CACHE_DIR / "profiles"
 
 _DAY_RE = re.compile(r"day(\d+)")
 _YEAR_RE = re.compile(r"year(\d+)")
 
 
+@dataclass(frozen=True, kw_only=True)
+class PhaseMeasurement:
+    """Resource usage of a single phase (`parse_input`, `part1` or `part2`) of
+    a solution."""
+
+    wall_time: float
+    """Elapsed wall-clock time, in seconds."""
+
+    cpu_time: float
+    """CPU time consumed by this process, in seconds."""
+
+    peak_memory: int | None
+    """Peak memory allocated by Python during the phase, in bytes, as measured
+    by `tracemalloc`. This is `None` if memory tracing was disabled."""
+
+    peak_rss: int | None = None
+    """Peak resident set size of the whole process during the phase, in bytes.
+
+    On Linux, the kernel's high-water mark is reset at the start of the phase,
+    so this only covers the phase. Elsewhere, it's the peak since the process
+    started. This is `None` if it couldn't be measured."""
+
+    def memory_usage(self) -> int | None:
+        """The measurement to compare against a memory budget: the peak RSS if
+        available, since that's what actually runs the machine out of memory,
+        and otherwise the `tracemalloc` peak.
+
+        >>> PhaseMeasurement(wall_time=0, cpu_time=0, peak_memory=1, peak_rss=2).memory_usage()
+        2
+        >>> PhaseMeasurement(wall_time=0, cpu_time=0, peak_memory=1).memory_usage()
+        1
+        """
+        return self.peak_rss if self.peak_rss is not None else self.peak_memory
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's record of this process's peak RSS (`VmHWM`) to its
+    current RSS. This is only possible on Linux, and is a no-op elsewhere."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> int | None:
+    """The peak resident set size of this process, in bytes.
+
+    >>> peak_rss() > 0
+    True
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (AttributeError, OSError):
+        return None
+    # This is in bytes on macOS, but in kibibytes everywhere else.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def format_bytes(num_bytes: int | None) -> str:
+    """
+    >>> format_bytes(None)
+    '-'
+    >>> format_bytes(512)
+    '512 B'
+    >>> format_bytes(3 * 1024 * 1024)
+    '3.0 MiB'
+    """
+    if num_bytes is None:
+        return "-"
+    value = float(num_bytes)
+    for unit in ["B", "KiB", "MiB"]:
+        if value < 1024:
+            return f"{num_bytes} B" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+def check_memory_budget(
+    phase: str, measurement: PhaseMeasurement, budget: int | None
+) -> None:
+    """Raise `MemoryBudgetExceeded` if the phase used more than `budget` bytes.
+
+    >>> measurement = PhaseMeasurement(wall_time=0, cpu_time=0, peak_memory=None, peak_rss=2048)
+    >>> check_memory_budget("part1", measurement, 4096)
+    >>> check_memory_budget("part1", measurement, 1024)
+    Traceback (most recent call last):
+    ...
+    year2025.utils._run.MemoryBudgetExceeded: part1 used 2.0 KiB, which exceeds the memory budget of 1.0 KiB
+    """
+    usage = measurement.memory_usage()
+    if budget is not None and usage is not None and usage > budget:
+        raise MemoryBudgetExceeded(
+            f"{phase} used {format_bytes(usage)}, which exceeds the memory budget of {format_bytes(budget)}"
+        )
+
+
+def measure_phase(
+    f: Callable[[], T], *, trace_memory: bool = False
+) -> tuple[T, PhaseMeasurement]:
+    """Call `f` and measure its resource usage.
+
+    If `trace_memory` is set, `tracemalloc` is started (if it wasn't already
+    running) for the duration of the call. The reported peak is relative to
+    the memory that was already allocated when the phase started, so that
+    earlier phases don't count towards later ones. Tracing hooks every
+    allocation, which can slow allocation-heavy code down several times, so
+    the times it reports are inflated. The peak RSS is always measured, since
+    that's cheap.
+
+    >>> (result, measurement) = measure_phase(lambda: [0] * 100_000)
+    >>> len(result)
+    100000
+    >>> repr(measurement.peak_memory)
+    'None'
+    >>> measurement.peak_rss >= 100_000 * 8
+    True
+    >>> (_, measurement) = measure_phase(lambda: [0] * 100_000, trace_memory=True)
+    >>> measurement.peak_memory >= 100_000 * 8
+    True
+    """
+    started_tracing = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+        (memory_before, _) = tracemalloc.get_traced_memory()
+    _reset_peak_rss()
+
+    try:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = f()
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+
+        peak_memory = None
+        if trace_memory:
+            (_, peak) = tracemalloc.get_traced_memory()
+            peak_memory = max(0, peak - memory_before)
+        rss = peak_rss()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    return (
+        result,
+        PhaseMeasurement(
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            peak_memory=peak_memory,
+            peak_rss=rss,
+        ),
+    )
+
+
+class JobTimeout(BaseException):
+    """Raised inside a worker when a job exceeds its time limit.
+
+    This derives from `BaseException` so that solutions which catch `Exception`
+    don't accidentally swallow it.
+    """
+
+
+@contextlib.contextmanager
+def time_limit(timeout: float | None) -> Iterator[None]:
+    """Raise `JobTimeout` in the current (main) thread if the body takes longer
+    than `timeout` seconds.
+
+    This relies on `SIGALRM`, so the timeout is not enforced on platforms
+    without it, or while a C extension is holding on to the interpreter.
+    (`run_all` backs it up by killing the worker process from the parent.)
+
+    >>> import pytest
+    >>> with pytest.raises(JobTimeout):
+    ...     with time_limit(0.01):
+    ...         while True:
+    ...             pass
+    >>> with time_limit(None):
+    ...     pass
+    """
+    if timeout is None or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def handler(signum: int, frame: FrameType | None) -> None:
+        raise JobTimeout(f"Timed out after {timeout} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def sha256_hex(data: str | bytes) -> str:
+    """
+    >>> sha256_hex("abc")[:16]
+    'ba7816bf8f01cfea'
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def source_hash(solution: type) -> str:
+    """Hash the source code that the answers of the given `Solution` class
+    depend on: the Python files in its day package, and in the `utils` package
+    for its year.
+
+    >>> import year2025.day01
+    >>> source_hash(year2025.day01.Solution) == source_hash(year2025.day01.Solution)
+    True
+    >>> import year2025.day02
+    >>> source_hash(year2025.day01.Solution) == source_hash(year2025.day02.Solution)
+    False
+    """
+    day_dir = Path(inspect.getfile(solution)).parent
+    year_dir = day_dir.parent
+    paths = sorted(day_dir.glob("*.py")) + sorted((year_dir / "utils").glob("*.py"))
+    hash = hashlib.sha256()
+    for path in paths:
+        hash.update(path.relative_to(year_dir).as_posix().encode())
+        hash.update(b"\0")
+        hash.update(path.read_bytes())
+        hash.update(b"\0")
+    return hash.hexdigest()
+
+
+@dataclass(frozen=True, kw_only=True)
+class AnswerCacheKey:
+    year: int
+    day: int
+    part: int
+    input_hash: str
+    source_hash: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class CachedAnswer:
+    answer: str
+    """The `str` of the value returned by the part."""
+
+    parse: PhaseMeasurement
+    """The resource usage of `parse_input` when the answer was computed."""
+
+    part: PhaseMeasurement
+    """The resource usage of the part when the answer was computed."""
+
+
+class AnswerCache:
+    """An on-disk cache of answers, so that unchanged solutions don't have to
+    be re-run.
+
+    The key includes hashes of the input and of the solution's source code, so
+    editing either invalidates the cached answer. Only the most recent answer
+    for each part of each day is kept.
+
+    >>> import tempfile
+    >>> key = AnswerCacheKey(year=2025, day=1, part=1, input_hash="i", source_hash="s")
+    >>> measurement = PhaseMeasurement(wall_time=1.0, cpu_time=1.0, peak_memory=None)
+    >>> with tempfile.TemporaryDirectory() as dir:
+    ...     with AnswerCache.open(Path(dir) / "answers.sqlite3") as cache:
+    ...         print(cache.get(key))
+    ...         cache.put(key, CachedAnswer(answer="42", parse=measurement, part=measurement))
+    ...         print(cache.get(key).answer)
+    ...         print(cache.get(dataclasses.replace(key, source_hash="t")))
+    None
+    42
+    None
+    """
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._connection = connection
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                year INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                part INTEGER NOT NULL,
+                input_hash TEXT NOT NULL,
+                source_hash TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                parse_measurement TEXT NOT NULL,
+                part_measurement TEXT NOT NULL,
+                PRIMARY KEY (year, day, part)
+            )
+            """
+        )
+
+    @classmethod
+    @contextlib.contextmanager
+    def open(cls, path: Path = CACHE_DIR / "answers.sqlite3") -> Iterator[Self]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                yield cls(connection)
+        finally:
+            connection.close()
+
+    def get(self, key: AnswerCacheKey) -> CachedAnswer | None:
+        row = self._connection.execute(
+            """
+            SELECT answer, parse_measurement, part_measurement
+            FROM answers
+            WHERE year = ? AND day = ? AND part = ? AND input_hash = ? AND source_hash = ?
+            """,
+            (key.year, key.day, key.part, key.input_hash, key.source_hash),
+        ).fetchone()
+        if row is None:
+            return None
+        (answer, parse_measurement, part_measurement) = row
+        return CachedAnswer(
+            answer=answer,
+            parse=PhaseMeasurement(**json.loads(parse_measurement)),
+            part=PhaseMeasurement(**json.loads(part_measurement)),
+        )
+
+    def put(self, key: AnswerCacheKey, answer: CachedAnswer) -> None:
+        self._connection.execute(
+            """
+            INSERT OR REPLACE INTO answers
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                key.year,
+                key.day,
+                key.part,
+                key.input_hash,
+                key.source_hash,
+                answer.answer,
+                json.dumps(dataclasses.asdict(answer.parse)),
+                json.dumps(dataclasses.asdict(answer.part)),
+            ),
+        )
+        self._connection.commit()
+
+
+PARSE_CACHE_SIZE = 8
+"""The number of parsed inputs to keep in memory. Parsed inputs can be large,
+so only a few are kept."""
+
+_parsed_inputs: collections.OrderedDict[tuple[type, str], object] = (
+    collections.OrderedDict()
+)
+
+
+def parse_input_cached(solution: type[S], input: str, *, disk: bool = False) -> S:
+    """Call `solution.parse_input(input)`, reusing the result of a previous
+    call with the same input if possible.
+
+    Results are kept in memory for the most recent `PARSE_CACHE_SIZE` inputs.
+    If `disk` is set, results are also pickled to `CACHE_DIR`, keyed by the
+    hashes of the input and the solution's source code, so that other
+    processes (such as the workers in `run_all`) can reuse them too.
+
+    Note that the same parsed object is returned each time, so `part1` and
+    `part2` must not leave it modified. (`Solution.main` has always shared one
+    parsed object between both parts.)
+
+    This is a function rather than only a method of `Solution` so that it
+    also works with the `Solution` classes of previous years.
+
+    >>> import year2025.day01
+    >>> solution = year2025.day01.Solution
+    >>> parsed = parse_input_cached(solution, year2025.day01.TEST_INPUT1)
+    >>> parsed is parse_input_cached(solution, year2025.day01.TEST_INPUT1)
+    True
+    >>> parsed is solution.parse_input(year2025.day01.TEST_INPUT1)
+    False
+    """
+    input_hash = sha256_hex(input)
+    key = (solution, input_hash)
+    if key in _parsed_inputs:
+        _parsed_inputs.move_to_end(key)
+        return cast(S, _parsed_inputs[key])
+
+    pickle_path = None
+    result = None
+    if disk:
+        pickle_path = (
+            CACHE_DIR
+            / "parsed"
+            / f"{solution.year()}-{solution.day():02}-{input_hash[:16]}-{source_hash(solution)[:16]}.pickle"
+        )
+        try:
+            with pickle_path.open("rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logging.exception("Could not load parsed input from %s", pickle_path)
+
+    if result is None:
+        result = solution.parse_input(input)
+        if pickle_path is not None:
+            _write_pickle(
+                pickle_path,
+                result,
+                stale_glob=f"{solution.year()}-{solution.day():02}-*.pickle",
+            )
+
+    _parsed_inputs[key] = result
+    while len(_parsed_inputs) > PARSE_CACHE_SIZE:
+        _parsed_inputs.popitem(last=False)
+    return result
+
+
+def _write_pickle(path: Path, value: object, *, stale_glob: str) -> None:
+    """Atomically write `value` to `path`, after deleting any other files in
+    the same directory matching `stale_glob`.
+
+    Not all parsed inputs can be pickled (for example, ones holding lambdas),
+    so failures are logged rather than raised.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale_path in path.parent.glob(stale_glob):
+        stale_path.unlink(missing_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open("wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except Exception:
+        logging.exception("Could not save parsed input to %s", path)
+        temp_path.unlink(missing_ok=True)
+
+
 class Solution(ABC):
     @classmethod
     @abstractmethod
@@ -45,7 +527,106 @@ class Solution(ABC):
         return int(match.group(1))
 
     @classmethod
-    def main(cls) -> None:
+    def input_path(cls) -> Path:
+        """The path to the puzzle input for this day, which may not exist yet."""
+        day_dir = cls._class_def_path().parent
+        return find_input(day_dir) or day_dir / INPUT_NAMES[0]
+
+    @classmethod
+    def parse_input_cached(cls, input: str, *, disk: bool = False) -> Self:
+        """See `parse_input_cached`."""
+        return parse_input_cached(cls, input, disk=disk)
+
+    @classmethod
+    def answer_cache_key(cls, *, part: int, input: str) -> AnswerCacheKey:
+        return AnswerCacheKey(
+            year=cls.year(),
+            day=cls.day(),
+            part=part,
+            input_hash=sha256_hex(input),
+            source_hash=source_hash(cls),
+        )
+
+    @classmethod
+    def main(cls, argv: Sequence[str] | None = None) -> None:
+        parser = argparse.ArgumentParser(
+            description=f"Solve {cls.year()} day {cls.day()}."
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Don't read or write the answer cache.",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Recompute the answers, then update the answer cache.",
+        )
+        parser.add_argument(
+            "--parse-cache",
+            action="store_true",
+            help="Reuse the parsed input from a previous run, if the input and code haven't changed.",
+        )
+        parser.add_argument(
+            "--memory-budget",
+            type=float,
+            metavar="MIB",
+            help="Fail if any phase's peak RSS exceeds this many mebibytes.",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help=f"Profile each phase with cProfile, writing the stats to {PROFILE_DIR}.",
+        )
+        parser.add_argument(
+            "--profile-format",
+            choices=PROFILE_FORMATS,
+            help="Profile each phase in this format (implies --profile). "
+            + "`speedscope` and `collapsed` use a sampling profiler and produce flame graphs.",
+        )
+        parser.add_argument(
+            "--trace-malloc",
+            action="store_true",
+            help="Report the source lines holding the most memory near each phase's peak "
+            + "(sampled with tracemalloc), and at its end.",
+        )
+        args = parser.parse_args(argv)
+        profile_format: ProfileFormat | None = args.profile_format or (
+            "pstats" if args.profile else None
+        )
+        profiling = profile_format is not None or args.trace_malloc
+        memory_budget = (
+            None
+            if args.memory_budget is None
+            else int(args.memory_budget * 1024 * 1024)
+        )
+
+        def check_measurement(name: str, measurement: PhaseMeasurement) -> None:
+            logging.info(
+                "%s took %.3fs (peak RSS %s)",
+                name,
+                measurement.wall_time,
+                format_bytes(measurement.peak_rss),
+            )
+            check_memory_budget(name, measurement, memory_budget)
+
+        def run_phase(name: str, f: Callable[[], T]) -> tuple[T, PhaseMeasurement]:
+            if profiling:
+                (result, measurement) = measure_phase(
+                    lambda: profile_call(
+                        f,
+                        name=f"{cls.year()}-{cls.day():02}-{name}",
+                        format=profile_format,
+                        output_dir=PROFILE_DIR,
+                        trace_malloc=args.trace_malloc,
+                    ),
+                    trace_memory=False,
+                )
+            else:
+                (result, measurement) = measure_phase(f, trace_memory=False)
+            check_measurement(name, measurement)
+            return (result, measurement)
+
         # https://stackoverflow.com/a/44175370/344643
         logging.basicConfig(
             format="%(asctime)s %(levelname)-8s %(message)s",
@@ -53,29 +634,100 @@ class Solution(ABC):
             datefmt="%Y-%m-%d %H:%M:%S",
         )
 
-        input_path = cls._class_def_path().parent / "input"
+        input_path = cls.input_path()
         if not input_path.exists():
             logging.info("Downloading input...")
+            missing = MissingInput(year=cls.year(), day=cls.day(), path=input_path)
             try:
-                subprocess.check_call(
-                    [
-                        "aoc",
-                        "download",
-                        "--input-only",
-                        "--year",
-                        str(cls.year()),
-                        "--day",
-                        str(cls.day()),
-                        "--input-file",
-                        str(input_path),
-                    ]
+                errors = asyncio.run(
+                    fetch_inputs([missing], read_session(), base_url=read_base_url())
+                )
+            except FetchError as e:
+                # No session cookie.
+                errors = [e]
+            if errors:
+                sys.exit(
+                    f"Could not download the input to {input_path}: {errors[0]}\n"
+                    + f"(Set $AOC_SESSION or write your session cookie to {SESSION_PATH}, "
+                    + f"or prefetch inputs with `python -m {__package__}.fetch --year {cls.year()}`.)"
                 )
-            except FileNotFoundError as e:
-                raise RuntimeError(
-                    "Could not download input. (Does the `aoc` binary exist? Install with `cargo install aoc-cli`.)"
-                ) from e
-        input_str = input_path.read_text()
-        solution = cls.parse_input(input_str)
-
-        print("part 1:", solution.part1())
-        print("part 2:", solution.part2())
+        # Read through the store, as `run_all` does, so the answer cache is
+        # keyed by the hash of exactly the text that's parsed.
+        inputs = InputStore({(cls.year(), cls.day()): input_path})
+        input_str = inputs.text(cls.year(), cls.day())
+
+        with contextlib.ExitStack() as stack:
+            # Profiling has to actually run each phase, and slows it down too
+            # much for the measurements to be worth caching.
+            cache = (
+                None
+                if args.no_cache or profiling
+                else stack.enter_context(AnswerCache.open())
+            )
+            parsed: tuple[Solution, PhaseMeasurement] | None = None
+            for part in [1, 2]:
+                key = cls.answer_cache_key(part=part, input=input_str)
+                cached = (
+                    cache.get(key) if cache is not None and not args.refresh else None
+                )
+                if cached is not None:
+                    logging.info("Using cached answer for part %d", part)
+                    check_measurement("parse", cached.parse)
+                    check_measurement(f"part{part}", cached.part)
+                    print(f"part {part}:", cached.answer)
+                    continue
+
+                if parsed is None:
+                    parsed = run_phase(
+                        "parse",
+                        lambda: cls.parse_input_cached(
+                            input_str, disk=args.parse_cache
+                        ),
+                    )
+                (solution, parse_measurement) = parsed
+                (answer, part_measurement) = run_phase(
+                    f"part{part}", solution.part1 if part == 1 else solution.part2
+                )
+                print(f"part {part}:", answer)
+                if cache is not None:
+                    cache.put(
+                        key,
+                        CachedAnswer(
+                            answer=str(answer),
+                            parse=parse_measurement,
+                            part=part_measurement,
+                        ),
+                    )
+
+
+class _UnfetchableSolution(Solution):
+    @classmethod
+    def parse_input(cls, input: str) -> Self:
+        return cls()
+
+    def part1(self) -> int:
+        return 1
+
+    def part2(self) -> int:
+        return 2
+
+
+def test_main_explains_missing_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    day_dir = tmp_path / "year9997" / "day01"
+    day_dir.mkdir(parents=True)
+    monkeypatch.setattr(
+        _UnfetchableSolution,
+        "_class_def_path",
+        classmethod(lambda cls: day_dir / "__init__.py"),
+    )
+
+    def read_no_session() -> str:
+        raise FetchError("No session cookie")
+
+    monkeypatch.setattr(sys.modules[__name__], "read_session", read_no_session)
+    with pytest.raises(SystemExit) as exc_info:
+        _UnfetchableSolution.main(["--no-cache"])
+    message = str(exc_info.value.code)
+    assert "No session cookie" in message and "$AOC_SESSION" in message
@@ -0,0 +1,577 @@
+"""Micro-benchmarks for the hot paths in `utils`.
+
+Run with e.g. `python -m year2025.utils.bench --scale medium`. To compare two
+revisions, run e.g. `python -m year2025.utils.bench --compare main HEAD`,
+which runs the benchmarks in this file against the `utils` package of each
+revision. With `--memory`, the benchmarks report the peak number of bytes
+allocated per operation instead of their speed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+# Imported absolutely (unlike the rest of `utils`), so that `--compare` can
+# run this file against the `utils` package of another revision.
+import year2025.utils as u
+
+SCALES = ["small", "medium", "large"]
+
+GRID_SIDES = {"small": 100, "medium": 1000, "large": 5000}
+"""The width and height of the synthetic grids for each scale."""
+
+GRAPH_SIZES = {"small": 10**4, "medium": 10**5, "large": 10**6}
+"""The number of nodes in the synthetic graphs for each scale."""
+
+
+@dataclass(frozen=True, kw_only=True)
+class Benchmark:
+    name: str
+
+    sizes: Mapping[str, int]
+    """The problem size for each scale."""
+
+    setup: Callable[[int], tuple[Callable[[], object], int]]
+    """Build the input for the given size, and return a function to time along
+    with the number of operations it performs per call."""
+
+
+def _open_grid(side: int) -> u.DenseGrid[str]:
+    return u.DenseGrid.from_2d([["."] * side for _ in range(side)])
+
+
+def _setup_grid_getitem(side: int) -> tuple[Callable[[], object], int]:
+    grid = _open_grid(side)
+    coords = list(grid.iter_coords())
+
+    def run() -> None:
+        for coord in coords:
+            grid[coord]
+
+    return (run, len(coords))
+
+
+def _setup_grid_setitem(side: int) -> tuple[Callable[[], object], int]:
+    grid = _open_grid(side)
+    coords = list(grid.iter_coords())
+
+    def run() -> None:
+        for coord in coords:
+            grid[coord] = "#"
+        for coord in coords:
+            grid[coord] = "."
+
+    return (run, 2 * len(coords))
+
+
+def _setup_coord_add(side: int) -> tuple[Callable[[], object], int]:
+    coords = [u.Coord(x, y) for y in range(side) for x in range(side)]
+    delta = u.Deltas2d.SOUTHEAST
+
+    def run() -> None:
+        for coord in coords:
+            coord + delta
+
+    return (run, len(coords))
+
+
+def _setup_coord_hash(side: int) -> tuple[Callable[[], object], int]:
+    coords = [u.Coord(x, y) for y in range(side) for x in range(side)]
+
+    def run() -> None:
+        for coord in coords:
+            hash(coord)
+
+    return (run, len(coords))
+
+
+def _setup_coord_set_lookup(side: int) -> tuple[Callable[[], object], int]:
+    seen = {u.Coord(x, y) for y in range(side) for x in range(side)}
+    # Equal but distinct objects, so that lookups have to compare them.
+    coords = [u.Coord(x, y) for y in range(side) for x in range(side)]
+
+    def run() -> None:
+        for coord in coords:
+            coord in seen
+
+    return (run, len(coords))
+
+
+def _setup_coord_table_add(side: int) -> tuple[Callable[[], object], int]:
+    table = u.CoordTable(side, side)
+    coords = [table.get(x, y) for y in range(side) for x in range(side)]
+    delta = u.Deltas2d.SOUTHEAST
+    add = table.add
+
+    def run() -> None:
+        for coord in coords:
+            add(coord, delta)
+
+    return (run, len(coords))
+
+
+def _setup_coord_walk(side: int) -> tuple[Callable[[], object], int]:
+    east = u.Deltas2d.EAST
+
+    def run() -> list[u.Coord]:
+        # Keep the path, like a search keeps the coordinates it has seen, so
+        # that `--memory` shows what each step allocates.
+        path = []
+        for y in range(side):
+            coord = u.Coord(0, y)
+            path.append(coord)
+            for _ in range(side - 1):
+                coord = coord + east
+                path.append(coord)
+        return path
+
+    return (run, side * side)
+
+
+def _setup_coord_table_walk(side: int) -> tuple[Callable[[], object], int]:
+    table = u.CoordTable(side, side)
+    east = u.Deltas2d.EAST
+    add = table.add
+
+    def run() -> list[u.Coord]:
+        path = []
+        for y in range(side):
+            coord = table.get(0, y)
+            path.append(coord)
+            for _ in range(side - 1):
+                coord = add(coord, east)
+                path.append(coord)
+        return path
+
+    return (run, side * side)
+
+
+def _grid_text(side: int) -> str:
+    rng = random.Random(0)
+    return "\n".join(
+        "".join(rng.choice("0123456789") for _ in range(side)) for _ in range(side)
+    )
+
+
+def _setup_grid_from_str(side: int) -> tuple[Callable[[], object], int]:
+    text = _grid_text(side)
+
+    def run() -> None:
+        u.DenseGrid.from_str(text)
+
+    return (run, side * side)
+
+
+def _setup_grid_from_bytes(side: int) -> tuple[Callable[[], object], int]:
+    data = _grid_text(side).encode()
+
+    def run() -> None:
+        u.DenseGrid.from_bytes(data, digits=True)
+
+    return (run, side * side)
+
+
+def _setup_grid_neighbors(side: int) -> tuple[Callable[[], object], int]:
+    grid = _open_grid(side)
+    coords = list(grid.iter_coords())
+
+    def run() -> None:
+        for coord in coords:
+            for _neighbor in grid.neighbors(coord, u.Deltas2d.CARDINAL):
+                pass
+
+    return (run, len(coords))
+
+
+def _setup_adjacency_neighbors(side: int) -> tuple[Callable[[], object], int]:
+    grid = _open_grid(side)
+    neighbors = grid.adjacency(u.Deltas2d.CARDINAL, lambda cell: cell != "#").neighbors
+    indices = range(side * side)
+
+    def run() -> None:
+        for index in indices:
+            for _neighbor in neighbors(index):
+                pass
+
+    return (run, len(indices))
+
+
+class _GridShortestPath(u.FindShortestPath[u.Coord]):
+    def __init__(self, grid: u.DenseGrid[str]) -> None:
+        self.grid = grid
+        self.end = u.Coord(grid.width - 1, grid.height - 1)
+
+    def is_end_node(self, node: u.Coord) -> bool:
+        return node == self.end
+
+    def get_neighbors(self, node: u.Coord) -> Iterable[tuple[u.Coord, int]]:
+        for neighbor in self.grid.neighbors(node, u.Deltas2d.CARDINAL):
+            yield (neighbor, 1)
+
+
+class _EncodedGridShortestPath(u.FindShortestPath[int]):
+    def __init__(self, grid: u.DenseGrid[str]) -> None:
+        self.neighbors = grid.neighbor_indices(u.Deltas2d.CARDINAL)
+        self.end = grid.encode(u.Coord(grid.width - 1, grid.height - 1))
+
+    def is_end_node(self, node: int) -> bool:
+        return node == self.end
+
+    def get_neighbors(self, node: int) -> Iterable[tuple[int, int]]:
+        return [(neighbor, 1) for neighbor in self.neighbors[node]]
+
+
+def _snake_grid(num_nodes: int) -> u.DenseGrid[str]:
+    side = math.isqrt(num_nodes)
+    grid = _open_grid(side)
+    # Walls with a gap at alternating ends, so that the path snakes through the
+    # whole grid and every node is visited.
+    for x in range(1, side - 1, 2):
+        for y in range(side - 1):
+            grid[u.Coord(x, y if x % 4 == 1 else y + 1)] = "#"
+    return grid
+
+
+def _setup_find_shortest_path(num_nodes: int) -> tuple[Callable[[], object], int]:
+    grid = _snake_grid(num_nodes)
+    find_shortest_path = _GridShortestPath(grid)
+    start = u.Coord(0, 0)
+
+    def run() -> None:
+        find_shortest_path.run([start])
+
+    return (run, grid.width * grid.height)
+
+
+def _setup_find_shortest_path_encoded(
+    num_nodes: int,
+) -> tuple[Callable[[], object], int]:
+    grid = _snake_grid(num_nodes)
+    find_shortest_path = _EncodedGridShortestPath(grid)
+    start = grid.encode(u.Coord(0, 0))
+
+    def run() -> None:
+        find_shortest_path.run([start])
+
+    return (run, grid.width * grid.height)
+
+
+def _setup_flood_fill(num_nodes: int) -> tuple[Callable[[], object], int]:
+    side = math.isqrt(num_nodes)
+    flood_fill = u.GridFloodFill(_open_grid(side))
+    start = u.Coord(side // 2, side // 2)
+
+    def run() -> None:
+        for _state in flood_fill.run_states([start]):
+            pass
+
+    return (run, side * side)
+
+
+def _setup_extract_int_list(num_ints: int) -> tuple[Callable[[], object], int]:
+    rng = random.Random(0)
+    input = "\n".join(
+        f"p={rng.randint(-1000, 1000)},{rng.randint(0, 1000)} v={rng.randint(-99, 99)},-{rng.randint(0, 99)}"
+        for _ in range(num_ints // 4)
+    )
+
+    def run() -> None:
+        u.extract_int_list(input)
+
+    return (run, num_ints // 4 * 4)
+
+
+BENCHMARKS = [
+    Benchmark(
+        name="DenseGrid.__getitem__", sizes=GRID_SIDES, setup=_setup_grid_getitem
+    ),
+    Benchmark(
+        name="DenseGrid.__setitem__", sizes=GRID_SIDES, setup=_setup_grid_setitem
+    ),
+    Benchmark(name="DenseGrid.from_str", sizes=GRID_SIDES, setup=_setup_grid_from_str),
+    Benchmark(
+        name="DenseGrid.from_bytes", sizes=GRID_SIDES, setup=_setup_grid_from_bytes
+    ),
+    Benchmark(name="Coord.__add__", sizes=GRID_SIDES, setup=_setup_coord_add),
+    Benchmark(name="Coord.__hash__", sizes=GRID_SIDES, setup=_setup_coord_hash),
+    Benchmark(name="Coord in set", sizes=GRID_SIDES, setup=_setup_coord_set_lookup),
+    Benchmark(name="CoordTable.add", sizes=GRID_SIDES, setup=_setup_coord_table_add),
+    Benchmark(name="Coord walk", sizes=GRID_SIDES, setup=_setup_coord_walk),
+    Benchmark(name="CoordTable walk", sizes=GRID_SIDES, setup=_setup_coord_table_walk),
+    Benchmark(
+        name="DenseGrid.neighbors", sizes=GRID_SIDES, setup=_setup_grid_neighbors
+    ),
+    Benchmark(
+        name="Adjacency.neighbors", sizes=GRID_SIDES, setup=_setup_adjacency_neighbors
+    ),
+    Benchmark(
+        name="FindShortestPath.run",
+        sizes=GRAPH_SIZES,
+        setup=_setup_find_shortest_path,
+    ),
+    Benchmark(
+        name="FindShortestPath.run[int]",
+        sizes=GRAPH_SIZES,
+        setup=_setup_find_shortest_path_encoded,
+    ),
+    Benchmark(name="FloodFill.run_states", sizes=GRAPH_SIZES, setup=_setup_flood_fill),
+    Benchmark(
+        name="extract_int_list", sizes=GRAPH_SIZES, setup=_setup_extract_int_list
+    ),
+]
+
+
+def time_ops_per_sec(f: Callable[[], object], ops: int, *, repeat: int = 3) -> float:
+    """Return the number of operations per second achieved by `f`, which
+    performs `ops` operations per call. The best of `repeat` timings is
+    used, each of which calls `f` enough times to take at least 0.2s."""
+    timer = timeit.Timer(f)
+    (number, _) = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return ops * number / best
+
+
+def peak_bytes_per_op(f: Callable[[], object], ops: int) -> float:
+    """Return the peak memory allocated while calling `f` (as measured by
+    `tracemalloc`), divided by the number of operations it performs."""
+    tracemalloc.start()
+    try:
+        (baseline, _) = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        f()
+        (_, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / ops
+
+
+BenchmarkResults = dict[str, dict[str, float]]
+"""Operations per second (or with `memory`, peak bytes allocated per
+operation), keyed by benchmark name and then by scale."""
+
+
+def run_benchmarks(
+    scales: Sequence[str],
+    *,
+    names: Sequence[str] | None = None,
+    repeat: int = 3,
+    memory: bool = False,
+) -> BenchmarkResults:
+    """Run the benchmarks at the given scales. Benchmarks which fail (for
+    example, because they use an API that doesn't exist in the revision being
+    measured) are reported on stderr and omitted from the results.
+
+    If `memory` is set, measure the peak bytes allocated per operation
+    rather than the operations per second."""
+    results: BenchmarkResults = {}
+    for benchmark in BENCHMARKS:
+        if names is not None and benchmark.name not in names:
+            continue
+        for scale in scales:
+            try:
+                (f, ops) = benchmark.setup(benchmark.sizes[scale])
+                result = (
+                    peak_bytes_per_op(f, ops)
+                    if memory
+                    else time_ops_per_sec(f, ops, repeat=repeat)
+                )
+            except Exception as e:
+                print(f"{benchmark.name} ({scale}) failed: {e!r}", file=sys.stderr)
+                continue
+            results.setdefault(benchmark.name, {})[scale] = result
+    return results
+
+
+def test_benchmarks() -> None:
+    for benchmark in BENCHMARKS:
+        (f, ops) = benchmark.setup(16)
+        f()
+        assert ops > 0
+    assert time_ops_per_sec(lambda: None, 1, repeat=1) > 0
+
+
+def test_coord_table_walk_allocates_less() -> None:
+    (coord_walk, ops) = _setup_coord_walk(32)
+    (table_walk, _) = _setup_coord_table_walk(32)
+    assert coord_walk() == table_walk()
+    # Each step of the plain walk allocates a new `Coord`, while the table's
+    # walk only grows the list.
+    assert peak_bytes_per_op(coord_walk, ops) > 4 * peak_bytes_per_op(table_walk, ops)
+
+
+def format_results(results: BenchmarkResults, *, unit: str = "ops/sec") -> str:
+    """
+    >>> print(format_results({"Coord.__add__": {"small": 1234567.8}}))
+    benchmark                    scale             ops/sec
+    Coord.__add__                small           1,234,568
+    >>> print(format_results({"Coord walk": {"small": 72.5}}, unit="bytes/op"))
+    benchmark                    scale            bytes/op
+    Coord walk                   small                  72
+    """
+    lines = [f"{'benchmark':<28} {'scale':<8} {unit:>16}"]
+    for name, by_scale in results.items():
+        for scale, ops_per_sec in by_scale.items():
+            lines.append(f"{name:<28} {scale:<8} {ops_per_sec:>16,.0f}")
+    return "\n".join(lines)
+
+
+def format_comparison(
+    revisions: tuple[str, str],
+    results: tuple[BenchmarkResults, BenchmarkResults],
+) -> str:
+    """
+    >>> print(format_comparison(
+    ...     ("main", "HEAD"),
+    ...     ({"Coord.__add__": {"small": 1000.0}, "extract_int_list": {"small": 10.0}},
+    ...      {"Coord.__add__": {"small": 1500.0}}),
+    ... ))
+    benchmark                    scale                main             HEAD   change
+    Coord.__add__                small               1,000            1,500    1.50x
+    extract_int_list             small                  10                -        -
+    """
+    (before_name, after_name) = revisions
+    (before, after) = results
+    lines = [
+        f"{'benchmark':<28} {'scale':<8} {before_name:>16} {after_name:>16} {'change':>8}"
+    ]
+    for name in {**before, **after}:
+        for scale in SCALES:
+            before_value = before.get(name, {}).get(scale)
+            after_value = after.get(name, {}).get(scale)
+            if before_value is None and after_value is None:
+                continue
+            change = (
+                f"{after_value / before_value:.2f}x"
+                if before_value is not None and after_value is not None
+                else "-"
+            )
+            lines.append(
+                f"{name:<28} {scale:<8} "
+                + (
+                    f"{before_value:>16,.0f}"
+                    if before_value is not None
+                    else f"{'-':>16}"
+                )
+                + " "
+                + (
+                    f"{after_value:>16,.0f}"
+                    if after_value is not None
+                    else f"{'-':>16}"
+                )
+                + f" {change:>8}"
+            )
+    return "\n".join(lines)
+
+
+def run_at_revision(revision: str, args: Sequence[str]) -> BenchmarkResults:
+    """Check out `revision` into a temporary worktree and run this file there
+    in a subprocess, so that it imports that revision's `utils`."""
+    repo_root = Path(__file__).resolve().parents[2]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        worktree = Path(temp_dir) / "worktree"
+        output = Path(temp_dir) / "results.json"
+        subprocess.check_call(
+            ["git", "worktree", "add", "--detach", "--quiet", str(worktree), revision],
+            cwd=repo_root,
+        )
+        try:
+            subprocess.check_call(
+                [
+                    sys.executable,
+                    "-c",
+                    "import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path(sys.argv[0], run_name='__main__')",
+                    __file__,
+                    *args,
+                    "--json",
+                    str(output),
+                ],
+                cwd=worktree,
+                env={**os.environ, "PYTHONPATH": str(worktree)},
+                stdout=subprocess.DEVNULL,
+            )
+            return json.loads(output.read_text())
+        finally:
+            subprocess.check_call(
+                ["git", "worktree", "remove", "--force", str(worktree)], cwd=repo_root
+            )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the `utils` hot paths.")
+    parser.add_argument(
+        "--scale",
+        choices=SCALES,
+        action="append",
+        help="Problem scale to run (may be repeated; default: small and medium).",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        help="Only run the benchmark with this name (may be repeated).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timings to take the best of (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Report the peak bytes allocated per operation (with `tracemalloc`) instead of ops/sec.",
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        metavar="PATH",
+        help="Also write the results as JSON to this path.",
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Run the benchmarks at two git revisions and compare them.",
+    )
+    args = parser.parse_args(argv)
+
+    scales = args.scale or ["small", "medium"]
+    if args.compare is not None:
+        forwarded_args = [f"--scale={scale}" for scale in scales]
+        forwarded_args += [f"--benchmark={name}" for name in args.benchmark or []]
+        forwarded_args += [f"--repeat={args.repeat}"]
+        forwarded_args += ["--memory"] if args.memory else []
+        (before, after) = args.compare
+        print(
+            format_comparison(
+                (before, after),
+                (
+                    run_at_revision(before, forwarded_args),
+                    run_at_revision(after, forwarded_args),
+                ),
+            )
+        )
+        return 0
+
+    results = run_benchmarks(
+        scales, names=args.benchmark, repeat=args.repeat, memory=args.memory
+    )
+    print(format_results(results, unit="bytes/op" if args.memory else "ops/sec"))
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
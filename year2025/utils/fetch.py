@@ -0,0 +1,286 @@
+"""Download missing puzzle inputs concurrently.
+
+Run with e.g. `python -m year2025.utils.fetch --year 2025`, before timing
+anything, so that no solution has to wait on the network.
+
+The session cookie is read from `$AOC_SESSION`, or else from
+`~/.adventofcode.session` (the same file `aoc-cli` uses).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import http.server
+import logging
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from ._inputs import INPUT_NAMES, REPO_ROOT, find_input
+
+BASE_URL = "https://adventofcode.com"
+
+SESSION_PATH = Path.home() / ".adventofcode.session"
+
+USER_AGENT = "year2025.utils.fetch (personal Advent of Code solutions)"
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True, kw_only=True)
+class MissingInput:
+    year: int
+    day: int
+    path: Path
+    """Where to write the input once it's downloaded."""
+
+
+class FetchError(Exception):
+    pass
+
+
+def read_base_url() -> str:
+    """The server to download from: `$AOC_BASE_URL` if set (e.g. to point at a
+    local stand-in server), and otherwise the real site."""
+    return os.environ.get("AOC_BASE_URL", BASE_URL)
+
+
+def read_session(session_path: Path = SESSION_PATH) -> str:
+    session = os.environ.get("AOC_SESSION")
+    if session:
+        return session.strip()
+    try:
+        return session_path.read_text().strip()
+    except FileNotFoundError as e:
+        raise FetchError(
+            f"No session cookie: set $AOC_SESSION or write it to {session_path}"
+        ) from e
+
+
+def missing_inputs(year: int, root: Path = REPO_ROOT) -> list[MissingInput]:
+    """Return the days of the given year which have code but no input.
+
+    >>> [missing.day for missing in missing_inputs(2025)]
+    []
+    """
+    result = []
+    for day_dir in sorted((root / f"year{year}").glob("day*")):
+        if not (day_dir / "__init__.py").exists() or find_input(day_dir) is not None:
+            continue
+        day = int(day_dir.name.removeprefix("day"))
+        result.append(MissingInput(year=year, day=day, path=day_dir / INPUT_NAMES[0]))
+    return result
+
+
+def _download(url: str, session: str, *, timeout: float) -> bytes:
+    request = urllib.request.Request(
+        url, headers={"Cookie": f"session={session}", "User-Agent": USER_AGENT}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+async def fetch_input(
+    missing: MissingInput,
+    session: str,
+    *,
+    base_url: str = BASE_URL,
+    retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 30.0,
+) -> None:
+    """Download one input and atomically write it to `missing.path`.
+
+    Transient failures (connection errors, rate limiting and server errors)
+    are retried up to `retries` times, waiting `backoff` seconds before the
+    first retry and doubling the wait each time.
+    """
+    url = f"{base_url}/{missing.year}/day/{missing.day}/input"
+    for attempt in range(retries + 1):
+        try:
+            data = await asyncio.to_thread(_download, url, session, timeout=timeout)
+            break
+        except urllib.error.HTTPError as e:
+            if e.code not in _RETRY_STATUSES or attempt == retries:
+                raise FetchError(f"Could not download {url}: HTTP {e.code}") from e
+        except (urllib.error.URLError, TimeoutError) as e:
+            if attempt == retries:
+                raise FetchError(f"Could not download {url}: {e}") from e
+        delay = backoff * 2**attempt
+        logging.info("Retrying %s in %gs", url, delay)
+        await asyncio.sleep(delay)
+    await asyncio.to_thread(_write_atomic, missing.path, data)
+    logging.info("Downloaded %s", missing.path)
+
+
+async def fetch_inputs(
+    missing: Iterable[MissingInput],
+    session: str,
+    *,
+    concurrency: int = 4,
+    base_url: str = BASE_URL,
+    retries: int = 3,
+    backoff: float = 1.0,
+) -> list[FetchError]:
+    """Download the inputs, at most `concurrency` at a time. Returns the
+    errors for any that couldn't be downloaded."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(missing: MissingInput) -> None:
+        async with semaphore:
+            await fetch_input(
+                missing,
+                session,
+                base_url=base_url,
+                retries=retries,
+                backoff=backoff,
+            )
+
+    results = await asyncio.gather(*(fetch(m) for m in missing), return_exceptions=True)
+    errors = []
+    for result in results:
+        if isinstance(result, FetchError):
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+    return errors
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Download missing puzzle inputs.")
+    parser.add_argument(
+        "--year",
+        type=int,
+        action="append",
+        required=True,
+        help="Download the missing inputs for this year (may be repeated).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of simultaneous downloads (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=read_base_url(),
+        help="The server to download from (default: $AOC_BASE_URL or %(default)s).",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    missing = [m for year in args.year for m in missing_inputs(year)]
+    if not missing:
+        logging.info("No missing inputs")
+        return 0
+    errors = asyncio.run(
+        fetch_inputs(
+            missing,
+            read_session(),
+            concurrency=args.concurrency,
+            base_url=args.base_url,
+        )
+    )
+    for error in errors:
+        logging.error("%s", error)
+    return 1 if errors else 0
+
+
+@dataclass
+class _StubServerState:
+    inputs: dict[str, bytes]
+    failures_remaining: int = 0
+    requests: int = 0
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    server: _StubServer
+
+    def do_GET(self) -> None:
+        state = self.server.state
+        state.requests += 1
+        if self.headers["Cookie"] != "session=test":
+            self.send_error(400)
+        elif state.failures_remaining > 0:
+            state.failures_remaining -= 1
+            self.send_error(503)
+        elif self.path not in state.inputs:
+            self.send_error(404)
+        else:
+            body = state.inputs[self.path]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _StubServer(http.server.ThreadingHTTPServer):
+    state: _StubServerState
+
+
+@contextlib.contextmanager
+def _stub_server(state: _StubServerState) -> Iterator[str]:
+    server = _StubServer(("127.0.0.1", 0), _StubHandler)
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_inputs(tmp_path: Path) -> None:
+    state = _StubServerState(
+        inputs={"/2025/day/1/input": b"1\n2\n", "/2025/day/2/input": b"abc\n"},
+        failures_remaining=2,
+    )
+    for day in [1, 2, 3]:
+        (tmp_path / "year2025" / f"day{day:02}").mkdir(parents=True)
+        (tmp_path / "year2025" / f"day{day:02}" / "__init__.py").touch()
+    missing = missing_inputs(2025, root=tmp_path)
+    assert [m.day for m in missing] == [1, 2, 3]
+
+    with _stub_server(state) as base_url:
+        errors = asyncio.run(
+            fetch_inputs(missing, "test", base_url=base_url, backoff=0)
+        )
+    assert [str(error) for error in errors] == [
+        f"Could not download {base_url}/2025/day/3/input: HTTP 404"
+    ]
+    assert (tmp_path / "year2025" / "day01" / "input").read_bytes() == b"1\n2\n"
+    assert (tmp_path / "year2025" / "day02" / "input").read_bytes() == b"abc\n"
+    assert [m.day for m in missing_inputs(2025, root=tmp_path)] == [3]
+    assert list((tmp_path / "year2025" / "day03").iterdir()) == [
+        tmp_path / "year2025" / "day03" / "__init__.py"
+    ]
+    assert state.requests == 5
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,988 @@
+"""Run every `Solution` in the repository and report how long each phase took.
+
+Run with e.g. `python -m year2025.utils.run_all --year 2024 --json timings.json`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import importlib
+import json
+import logging
+import math
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import os
+import pkgutil
+import re
+import signal
+import sys
+import time
+import traceback
+from collections.abc import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Sequence,
+)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar, cast
+
+import pytest
+
+from ._answers import (
+    ANSWERS_PATH,
+    ManifestEntry,
+    format_manifest,
+    load_manifest,
+    suggest_budget,
+)
+from ._funs import group_by
+from ._inputs import INPUT_NAMES, InputStore, find_input
+from ._run import (
+    CACHE_DIR,
+    AnswerCache,
+    AnswerCacheKey,
+    CachedAnswer,
+    JobTimeout,
+    MemoryBudgetExceeded,
+    PhaseMeasurement,
+    Solution,
+    check_memory_budget,
+    format_bytes,
+    measure_phase,
+    parse_input_cached,
+    sha256_hex,
+    source_hash,
+    time_limit,
+)
+
+T = TypeVar("T")
+
+YEARS = [2023, 2024, 2025]
+"""Years whose days are implemented as `Solution` subclasses."""
+
+_DAY_MODULE_RE = re.compile(r"day(\d+)")
+
+PHASES = ["parse", "part1", "part2"]
+
+KILL_GRACE = 5.0
+"""How many seconds past its timeout a job may keep running before the
+parent kills its worker process. Jobs normally stop themselves at the timeout
+via `time_limit`, but that can't interrupt code which is blocked in C."""
+
+
+def discover_solutions(years: Iterable[int] = YEARS) -> list[type[Solution]]:
+    """Import every `yearNNNN.dayNN` package for the given years and return
+    their `Solution` classes, ordered by year and day.
+
+    Note that the `Solution` classes for different years derive from different
+    copies of the `Solution` base class, so they are found by name rather than
+    by subclass checks.
+
+    >>> solutions = discover_solutions([2025])
+    >>> (solutions[0].year(), solutions[0].day())
+    (2025, 1)
+    """
+    result: list[type[Solution]] = []
+    for year in years:
+        year_package = importlib.import_module(f"year{year}")
+        for module_info in pkgutil.iter_modules(year_package.__path__):
+            if not _DAY_MODULE_RE.fullmatch(module_info.name):
+                continue
+            module = importlib.import_module(f"year{year}.{module_info.name}")
+            solution = getattr(module, "Solution", None)
+            if isinstance(solution, type):
+                result.append(solution)
+    result.sort(key=lambda solution: (solution.year(), solution.day()))
+    return result
+
+
+def input_path(solution: type[Solution]) -> Path:
+    """Return the input path for the given solution.
+
+    This doesn't call `Solution.input_path`, since older years' `Solution`
+    classes don't have it.
+    """
+    day_dir = solution._class_def_path().parent
+    return find_input(day_dir) or day_dir / INPUT_NAMES[0]
+
+
+@dataclass(frozen=True, kw_only=True)
+class PhaseResult:
+    phase: str
+    """One of `PHASES`."""
+
+    measurement: PhaseMeasurement | None
+    """The resource usage of the phase, or `None` if it didn't complete."""
+
+    answer: str | None = None
+    """The `str` of the value returned by `part1`/`part2`."""
+
+    error: str | None = None
+    """The formatted exception, if the phase raised one."""
+
+    cached: bool = False
+    """Whether the result was loaded from the answer cache rather than run."""
+
+
+@dataclass(frozen=True, kw_only=True)
+class PuzzleResult:
+    year: int
+    day: int
+    phases: list[PhaseResult]
+
+    def ok(self) -> bool:
+        return len(self.phases) == len(PHASES) and all(
+            phase.error is None for phase in self.phases
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class Job:
+    """A unit of work for the process pool: parse the input for one day and
+    run one of its parts."""
+
+    module: str
+    """The module containing the `Solution` class, e.g. `year2025.day01`."""
+
+    year: int
+    day: int
+    part: int
+
+    @classmethod
+    def for_solution(cls, solution: type[Solution]) -> list[Job]:
+        return [
+            cls(
+                module=solution.__module__,
+                year=solution.year(),
+                day=solution.day(),
+                part=part,
+            )
+            for part in [1, 2]
+        ]
+
+    def key(self) -> str:
+        """The key used to look up this job in the timings file.
+
+        >>> Job(module="year2025.day01", year=2025, day=1, part=2).key()
+        '2025/1/2'
+        """
+        return f"{self.year}/{self.day}/{self.part}"
+
+
+def _run_phase(
+    phase: str, f: Callable[[], T], *, trace_memory: bool
+) -> tuple[T | None, PhaseResult]:
+    try:
+        (result, measurement) = measure_phase(f, trace_memory=trace_memory)
+    except (Exception, JobTimeout):
+        return (
+            None,
+            PhaseResult(phase=phase, measurement=None, error=traceback.format_exc()),
+        )
+    return (result, PhaseResult(phase=phase, measurement=measurement))
+
+
+def run_job(
+    job: Job,
+    input_str: str,
+    *,
+    trace_memory: bool = False,
+    timeout: float | None = None,
+    parse_cache: bool = False,
+) -> list[PhaseResult]:
+    """Parse the input for the job's day and run the job's part, measuring
+    each phase separately. This is called in a worker process, with the input
+    read by the parent's `InputStore`.
+
+    If `parse_cache` is set, the parsed input is shared with other jobs for the
+    same day via `parse_input_cached`, so the parse phase measures loading it.
+
+    If parsing fails, then only the result for the parse phase is returned.
+    The timeout covers both phases.
+    """
+    solution: type[Solution] = getattr(importlib.import_module(job.module), "Solution")
+    with time_limit(timeout):
+        (parsed, parse_result) = _run_phase(
+            "parse",
+            lambda: (
+                parse_input_cached(solution, input_str, disk=True)
+                if parse_cache
+                else solution.parse_input(input_str)
+            ),
+            trace_memory=trace_memory,
+        )
+        if parsed is None:
+            return [parse_result]
+
+        part = parsed.part1 if job.part == 1 else parsed.part2
+        (answer, part_result) = _run_phase(
+            f"part{job.part}", part, trace_memory=trace_memory
+        )
+    if part_result.error is None:
+        part_result = dataclasses.replace(part_result, answer=str(answer))
+    return [parse_result, part_result]
+
+
+def _job_duration(phases: Sequence[PhaseResult], timeout: float | None) -> float:
+    """The duration to record for a job, for scheduling future runs."""
+    if any(phase.error is not None and "JobTimeout" in phase.error for phase in phases):
+        assert timeout is not None
+        return timeout
+    return sum(
+        phase.measurement.wall_time for phase in phases if phase.measurement is not None
+    )
+
+
+def load_timings(path: Path) -> dict[str, float]:
+    """Load the durations of previous jobs, as written by `save_timings`. A
+    missing or corrupt file is treated as empty."""
+    try:
+        timings = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(timings, dict):
+        return {}
+    return {key: float(value) for key, value in timings.items()}
+
+
+def save_timings(path: Path, timings: Mapping[str, float]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(sorted(timings.items())), indent=2) + "\n")
+
+
+def schedule(jobs: Iterable[Job], timings: Mapping[str, float]) -> list[Job]:
+    """Order the jobs so that the longest jobs start first, which minimizes
+    the total time when running them in parallel. Jobs that haven't been
+    timed before might be arbitrarily slow, so they go first of all.
+
+    >>> jobs = [
+    ...     Job(module="year2025.day01", year=2025, day=1, part=1),
+    ...     Job(module="year2025.day01", year=2025, day=1, part=2),
+    ...     Job(module="year2025.day02", year=2025, day=2, part=1),
+    ... ]
+    >>> [job.key() for job in schedule(jobs, {"2025/1/1": 1.0, "2025/1/2": 5.0})]
+    ['2025/2/1', '2025/1/2', '2025/1/1']
+    """
+    return sorted(jobs, key=lambda job: -timings.get(job.key(), math.inf))
+
+
+def _pop_next_job(
+    pending: list[Job], busy_days: Collection[tuple[int, int]]
+) -> Job | None:
+    """Remove and return the first pending job whose `(year, day)` isn't in
+    `busy_days`, if any.
+
+    >>> pending = [
+    ...     Job(module="year2025.day01", year=2025, day=1, part=2),
+    ...     Job(module="year2025.day02", year=2025, day=2, part=1),
+    ... ]
+    >>> _pop_next_job(pending, {(2025, 1)}).key()
+    '2025/2/1'
+    >>> print(_pop_next_job(pending, {(2025, 1)}))
+    None
+    """
+    for i, job in enumerate(pending):
+        if (job.year, job.day) not in busy_days:
+            del pending[i]
+            return job
+    return None
+
+
+def _job_worker(
+    connection: multiprocessing.connection.Connection,
+    job: Job,
+    input_str: str,
+    *,
+    trace_memory: bool,
+    timeout: float | None,
+    parse_cache: bool,
+) -> None:
+    """The entry point of a worker process: run the job, and send its results
+    back to the parent."""
+    with connection:
+        try:
+            phases = run_job(
+                job,
+                input_str,
+                trace_memory=trace_memory,
+                timeout=timeout,
+                parse_cache=parse_cache,
+            )
+        except BaseException:
+            # For example, the solution couldn't be imported.
+            phases = [
+                PhaseResult(
+                    phase=f"part{job.part}",
+                    measurement=None,
+                    error=traceback.format_exc(),
+                )
+            ]
+        connection.send(phases)
+
+
+@dataclass(frozen=True, kw_only=True)
+class _RunningJob:
+    job: Job
+    process: multiprocessing.process.BaseProcess
+    connection: multiprocessing.connection.Connection
+    deadline: float
+    """The `time.monotonic()` time at which to kill the worker."""
+
+
+def _finish(running: _RunningJob, *, killed_after: float | None) -> list[PhaseResult]:
+    """Collect the results of a job whose worker has sent them or exited, or
+    kill the worker if `killed_after` is set."""
+    try:
+        if killed_after is not None:
+            running.process.kill()
+            error = f"JobTimeout: killed the worker after {killed_after:g} seconds"
+        else:
+            try:
+                return cast(list[PhaseResult], running.connection.recv())
+            except EOFError:
+                running.process.join()
+                exit_code = running.process.exitcode
+                error = f"WorkerDied: the worker exited with code {exit_code}"
+                if exit_code is not None and exit_code < 0:
+                    error += f" ({signal.Signals(-exit_code).name})"
+    finally:
+        running.connection.close()
+    return [PhaseResult(phase=f"part{running.job.part}", measurement=None, error=error)]
+
+
+def run_jobs(
+    jobs: Sequence[Job],
+    inputs: InputStore,
+    *,
+    max_workers: int | None = None,
+    trace_memory: bool = False,
+    timeout: float | None = None,
+    parse_cache: bool = False,
+    timings: MutableMapping[str, float] | None = None,
+    kill_grace: float = KILL_GRACE,
+) -> dict[Job, list[PhaseResult]]:
+    """Run the jobs in parallel worker processes, in the order given by
+    `schedule`, on the inputs from `inputs`.
+
+    If `timings` is provided, it's used to schedule the jobs and is then
+    updated with the durations of the jobs that ran.
+
+    Each job runs in a fresh worker process, since memory freed by earlier
+    jobs often isn't returned to the OS and would count towards the peak RSS
+    of later ones. This also means that a job which is still running
+    `kill_grace` seconds after its `timeout` can be stopped by killing its
+    worker, without affecting the other jobs.
+
+    If `parse_cache` is set, jobs for the same day are run one after another
+    rather than at the same time, so that the later one loads the input
+    parsed by the earlier one instead of parsing it again.
+    """
+    if timings is None:
+        timings = {}
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    pending = schedule(jobs, timings)
+    running: list[_RunningJob] = []
+    job_results: dict[Job, list[PhaseResult]] = {}
+    try:
+        while pending or running:
+            while len(running) < max_workers:
+                busy_days = (
+                    {(worker.job.year, worker.job.day) for worker in running}
+                    if parse_cache
+                    else set()
+                )
+                job = _pop_next_job(pending, busy_days)
+                if job is None:
+                    break
+                (receiver, sender) = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_job_worker,
+                    args=(sender, job, inputs.text(job.year, job.day)),
+                    kwargs={
+                        "trace_memory": trace_memory,
+                        "timeout": timeout,
+                        "parse_cache": parse_cache,
+                    },
+                    name=f"run_all {job.key()}",
+                )
+                process.start()
+                # Close the parent's copy of the sending end, so that the
+                # receiving end sees EOF if the worker dies.
+                sender.close()
+                running.append(
+                    _RunningJob(
+                        job=job,
+                        process=process,
+                        connection=receiver,
+                        deadline=(
+                            math.inf
+                            if timeout is None
+                            else time.monotonic() + timeout + kill_grace
+                        ),
+                    )
+                )
+
+            next_deadline = min(worker.deadline for worker in running)
+            ready = multiprocessing.connection.wait(
+                [worker.connection for worker in running],
+                timeout=(
+                    None
+                    if next_deadline == math.inf
+                    else max(0.0, next_deadline - time.monotonic())
+                ),
+            )
+            now = time.monotonic()
+            still_running = []
+            for worker in running:
+                if worker.connection in ready:
+                    phases = _finish(worker, killed_after=None)
+                elif now >= worker.deadline:
+                    assert timeout is not None
+                    logging.warning(
+                        "Killing %s, which ignored its timeout", worker.job.key()
+                    )
+                    phases = _finish(worker, killed_after=timeout + kill_grace)
+                else:
+                    still_running.append(worker)
+                    continue
+                worker.process.join()
+                logging.info("Finished %s", worker.job.key())
+                job_results[worker.job] = phases
+                timings[worker.job.key()] = _job_duration(phases, timeout=timeout)
+            running = still_running
+    finally:
+        for worker in running:
+            worker.process.kill()
+            worker.process.join()
+            worker.connection.close()
+    return job_results
+
+
+@contextlib.contextmanager
+def _test_day(
+    root: Path, monkeypatch: pytest.MonkeyPatch, year: int, source: str
+) -> Iterator[type[Solution]]:
+    """Write a day package with the given source and an empty input under
+    `root`, and import its `Solution` for the duration of the block."""
+    day_dir = root / f"year{year}" / "day01"
+    day_dir.mkdir(parents=True)
+    (day_dir.parent / "__init__.py").touch()
+    (day_dir / "__init__.py").write_text(source)
+    (day_dir / "input").write_text("")
+    monkeypatch.syspath_prepend(root)
+    try:
+        yield importlib.import_module(f"year{year}.day01").Solution
+    finally:
+        for name in [f"year{year}", f"year{year}.day01"]:
+            sys.modules.pop(name, None)
+
+
+_STUCK_SOLUTION = """
+import signal
+import time
+
+from year2025 import utils as u
+
+
+class Solution(u.Solution):
+    @classmethod
+    def parse_input(cls, input: str) -> "Solution":
+        return cls()
+
+    def part1(self) -> int:
+        # Simulate being stuck in C code, which `time_limit` can't interrupt.
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(60)
+        return 1
+
+    def part2(self) -> int:
+        return 2
+"""
+
+
+def test_run_jobs_kills_stuck_jobs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with _test_day(tmp_path, monkeypatch, 9998, _STUCK_SOLUTION) as solution:
+        (part1, part2) = Job.for_solution(solution)
+        start = time.monotonic()
+        results = run_jobs(
+            [part1, part2],
+            InputStore.load(tmp_path),
+            max_workers=2,
+            timeout=0.5,
+            kill_grace=0.5,
+            timings={},
+        )
+    assert time.monotonic() - start < 30
+    assert results[part2][-1].answer == "2"
+    error = results[part1][-1].error
+    assert error is not None and error.startswith("JobTimeout: killed the worker")
+
+
+_COUNTING_SOLUTION = """
+import time
+from pathlib import Path
+
+from year2025 import utils as u
+
+
+class Solution(u.Solution):
+    @classmethod
+    def parse_input(cls, input: str) -> "Solution":
+        with (Path(__file__).parent / "parses").open("a") as f:
+            f.write("parsed\\n")
+        # Long enough for both parts to be parsing at once, if they could.
+        time.sleep(0.5)
+        return cls()
+
+    def part1(self) -> int:
+        return 1
+
+    def part2(self) -> int:
+        return 2
+"""
+
+
+def test_run_jobs_parses_once_per_day(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with _test_day(tmp_path, monkeypatch, 9999, _COUNTING_SOLUTION) as solution:
+        jobs = Job.for_solution(solution)
+        try:
+            results = run_jobs(
+                jobs,
+                InputStore.load(tmp_path),
+                max_workers=2,
+                parse_cache=True,
+                timings={},
+            )
+        finally:
+            for path in (CACHE_DIR / "parsed").glob("9999-01-*.pickle"):
+                path.unlink()
+    assert [results[job][-1].answer for job in jobs] == ["1", "2"]
+    parses = tmp_path / "year9999" / "day01" / "parses"
+    assert parses.read_text().splitlines() == ["parsed"]
+
+
+def collect_results(job_results: Mapping[Job, list[PhaseResult]]) -> list[PuzzleResult]:
+    """Group the results of the jobs by day."""
+    puzzle_jobs = group_by(((job.year, job.day), job) for job in job_results)
+    results = []
+    for (year, day), day_jobs in sorted(puzzle_jobs.items()):
+        # Each job parses the input separately; report the parse of the first
+        # part that ran.
+        phases: list[PhaseResult] = []
+        for job in sorted(day_jobs, key=lambda job: job.part):
+            for phase in job_results[job]:
+                if phase.phase == "parse" and any(
+                    existing.phase == "parse" for existing in phases
+                ):
+                    continue
+                phases.append(phase)
+        results.append(PuzzleResult(year=year, day=day, phases=phases))
+    return results
+
+
+def cache_key(job: Job, *, input_hash: str, source_hash: str) -> AnswerCacheKey:
+    return AnswerCacheKey(
+        year=job.year,
+        day=job.day,
+        part=job.part,
+        input_hash=input_hash,
+        source_hash=source_hash,
+    )
+
+
+def cached_phases(answer: CachedAnswer, *, part: int) -> list[PhaseResult]:
+    return [
+        PhaseResult(phase="parse", measurement=answer.parse, cached=True),
+        PhaseResult(
+            phase=f"part{part}",
+            measurement=answer.part,
+            answer=answer.answer,
+            cached=True,
+        ),
+    ]
+
+
+def to_cached_answer(phases: Sequence[PhaseResult]) -> CachedAnswer | None:
+    """Convert the results of a successful job into an entry for the answer
+    cache, or return `None` if the job failed."""
+    if len(phases) != 2:
+        return None
+    (parse, part) = phases
+    if parse.measurement is None or part.measurement is None or part.answer is None:
+        return None
+    return CachedAnswer(
+        answer=part.answer, parse=parse.measurement, part=part.measurement
+    )
+
+
+def record_answers(path: Path, results: Sequence[PuzzleResult]) -> None:
+    """Update the answer manifest at `path` with the answers of the successful
+    results. Entries for days that weren't run or that failed are kept, and
+    parts that were left out of an existing entry stay out."""
+    entries = {
+        (entry.year, entry.day): entry
+        for entry in (load_manifest(path) if path.exists() else [])
+    }
+    for result in results:
+        if not result.ok():
+            logging.warning(
+                "Not recording answers for %d day %d, since it failed",
+                result.year,
+                result.day,
+            )
+            continue
+        (parse, part1, part2) = result.phases
+        existing = entries.get((result.year, result.day))
+        # For example, a part that isn't solved yet.
+        omitted = (
+            set()
+            if existing is None
+            else {
+                phase.phase
+                for (phase, answer) in [
+                    (part1, existing.part1),
+                    (part2, existing.part2),
+                ]
+                if answer is None
+            }
+        )
+        recorded = [
+            phase for phase in [parse, part1, part2] if phase.phase not in omitted
+        ]
+        entries[result.year, result.day] = ManifestEntry(
+            year=result.year,
+            day=result.day,
+            part1=None if "part1" in omitted else part1.answer,
+            part2=None if "part2" in omitted else part2.answer,
+            budget=suggest_budget(
+                sum(
+                    phase.measurement.wall_time
+                    for phase in recorded
+                    if phase.measurement is not None
+                )
+            ),
+        )
+    path.write_text(format_manifest(entries.values()))
+
+
+def test_record_answers_keeps_omitted_parts(tmp_path: Path) -> None:
+    path = tmp_path / "answers.toml"
+    path.write_text("[year2023.day10]\npart1 = 1\nbudget = 1.0\n")
+    measurement = PhaseMeasurement(wall_time=0.1, cpu_time=0.1, peak_memory=None)
+    record_answers(
+        path,
+        [
+            PuzzleResult(
+                year=year,
+                day=10,
+                phases=[
+                    PhaseResult(phase="parse", measurement=measurement),
+                    PhaseResult(phase="part1", measurement=measurement, answer="6"),
+                    PhaseResult(phase="part2", measurement=measurement, answer="0"),
+                ],
+            )
+            for year in [2023, 2024]
+        ],
+    )
+    assert load_manifest(path) == [
+        ManifestEntry(year=2023, day=10, part1="6", part2=None, budget=1.0),
+        ManifestEntry(year=2024, day=10, part1="6", part2="0", budget=1.0),
+    ]
+
+
+def enforce_memory_budget(
+    phases: Sequence[PhaseResult], budget: int
+) -> list[PhaseResult]:
+    """Mark any phases which used more than `budget` bytes as failed.
+
+    >>> phases = enforce_memory_budget([
+    ...     PhaseResult(
+    ...         phase="parse",
+    ...         measurement=PhaseMeasurement(wall_time=0, cpu_time=0, peak_memory=1, peak_rss=2048),
+    ...     ),
+    ... ], 1024)
+    >>> phases[0].error
+    'MemoryBudgetExceeded: parse used 2.0 KiB, which exceeds the memory budget of 1.0 KiB'
+    """
+    result = []
+    for phase in phases:
+        if phase.error is None and phase.measurement is not None:
+            try:
+                check_memory_budget(phase.phase, phase.measurement, budget)
+            except MemoryBudgetExceeded as e:
+                phase = dataclasses.replace(phase, error=f"{type(e).__name__}: {e}")
+        result.append(phase)
+    return result
+
+
+def format_table(results: Sequence[PuzzleResult]) -> str:
+    """Format the results as a human-readable table, one row per phase.
+
+    >>> result = PuzzleResult(year=2025, day=1, phases=[
+    ...     PhaseResult(
+    ...         phase="parse",
+    ...         measurement=PhaseMeasurement(
+    ...             wall_time=0.5, cpu_time=0.25, peak_memory=2048, peak_rss=30 * 1024 * 1024
+    ...         ),
+    ...     ),
+    ...     PhaseResult(phase="part1", measurement=None, error="ValueError: oops"),
+    ... ])
+    >>> print(format_table([result]))
+    year  day  phase      wall (s)     cpu (s)     peak mem     peak rss  answer
+    2025    1  parse         0.500       0.250      2.0 KiB     30.0 MiB
+    2025    1  part1             -           -            -            -  ERROR: ValueError: oops
+    """
+    lines = [
+        f"{'year':<4}  {'day':>3}  {'phase':<5}  {'wall (s)':>12}  {'cpu (s)':>10}  {'peak mem':>11}  {'peak rss':>11}  answer"
+    ]
+    for result in results:
+        for phase in result.phases:
+            if phase.measurement is None:
+                wall_time = cpu_time = "-"
+                peak_memory = peak_rss = "-"
+            else:
+                wall_time = f"{phase.measurement.wall_time:.3f}"
+                cpu_time = f"{phase.measurement.cpu_time:.3f}"
+                peak_memory = format_bytes(phase.measurement.peak_memory)
+                peak_rss = format_bytes(phase.measurement.peak_rss)
+            if phase.error is not None:
+                answer = "ERROR: " + phase.error.strip().splitlines()[-1]
+            else:
+                answer = phase.answer or ""
+            if phase.cached:
+                answer = f"{answer} (cached)".lstrip()
+            lines.append(
+                f"{result.year:<4}  {result.day:>3}  {phase.phase:<5}  {wall_time:>12}  {cpu_time:>10}  {peak_memory:>11}  {peak_rss:>11}  {answer}".rstrip()
+            )
+    return "\n".join(lines)
+
+
+def to_json(results: Sequence[PuzzleResult]) -> str:
+    """Serialize the results as JSON, for tracking over time.
+
+    >>> result = PuzzleResult(year=2025, day=1, phases=[
+    ...     PhaseResult(
+    ...         phase="part1",
+    ...         measurement=PhaseMeasurement(wall_time=0.5, cpu_time=0.25, peak_memory=None),
+    ...         answer="42",
+    ...     ),
+    ... ])
+    >>> print(to_json([result]))
+    [
+      {
+        "year": 2025,
+        "day": 1,
+        "phases": [
+          {
+            "phase": "part1",
+            "measurement": {
+              "wall_time": 0.5,
+              "cpu_time": 0.25,
+              "peak_memory": null,
+              "peak_rss": null
+            },
+            "answer": "42",
+            "error": null,
+            "cached": false
+          }
+        ]
+      }
+    ]
+    """
+    return json.dumps([dataclasses.asdict(result) for result in results], indent=2)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run every solution on its real input and report per-phase timings."
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        action="append",
+        choices=YEARS,
+        help="Only run solutions for this year (may be repeated).",
+    )
+    parser.add_argument(
+        "--day",
+        type=int,
+        action="append",
+        help="Only run solutions for this day (may be repeated).",
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        metavar="PATH",
+        help="Also write the results as JSON to this path ('-' for stdout).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also measure the peak memory allocated by Python with `tracemalloc`. "
+        + "This slows down allocation-heavy solutions, so the reported times are inflated.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Abort any part (including parsing) that takes longer than this (default: %(default)s). "
+        + f"Workers which are still running {KILL_GRACE:g} seconds later are killed.",
+    )
+    parser.add_argument(
+        "--timings",
+        type=Path,
+        default=CACHE_DIR / "timings.json",
+        metavar="PATH",
+        help="Durations of previous runs, used to start the slowest parts first (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the answer cache.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-run every part, then update the answer cache.",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="Share parsed inputs between parts and runs via pickles in the cache directory.",
+    )
+    parser.add_argument(
+        "--record-answers",
+        action="store_true",
+        help=f"Record the answers and time budgets in {ANSWERS_PATH.name}, for checking with `pytest --answers`. "
+        + "Implies --refresh, overrides --trace-memory and --parse-cache, "
+        + "and raises --timeout to the largest budget already recorded.",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MIB",
+        help="Fail any phase whose peak RSS exceeds this many mebibytes.",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show log messages.")
+    args = parser.parse_args(argv)
+    if args.record_answers:
+        # The budgets are checked against fresh, untraced runs which parse the
+        # input from scratch, so they have to be measured the same way.
+        args.refresh = True
+        args.trace_memory = False
+        args.parse_cache = False
+        # Otherwise days which are already in the manifest but take longer
+        # than the timeout would fail, and silently keep their old entries.
+        if ANSWERS_PATH.exists():
+            args.timeout = max(
+                [args.timeout] + [entry.budget for entry in load_manifest()]
+            )
+
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        level=logging.INFO if args.verbose else logging.WARNING,
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    solutions = [
+        solution
+        for solution in discover_solutions(args.year or YEARS)
+        if args.day is None or solution.day() in args.day
+    ]
+    with contextlib.ExitStack() as stack:
+        # Traced measurements are slower than untraced ones, so they're kept
+        # out of the answer cache, and untraced ones from it lack the memory
+        # measurements.
+        cache = (
+            None
+            if args.no_cache or args.trace_memory
+            else stack.enter_context(AnswerCache.open())
+        )
+        job_results: dict[Job, list[PhaseResult]] = {}
+        job_keys: dict[Job, AnswerCacheKey] = {}
+        inputs = InputStore.load(years=args.year or YEARS)
+        for solution in solutions:
+            if (solution.year(), solution.day()) not in inputs:
+                logging.warning(
+                    "Skipping %d day %d: no input at %s",
+                    solution.year(),
+                    solution.day(),
+                    input_path(solution),
+                )
+                continue
+            input_hash = sha256_hex(inputs.text(solution.year(), solution.day()))
+            solution_hash = source_hash(solution)
+            for job in Job.for_solution(solution):
+                key = cache_key(job, input_hash=input_hash, source_hash=solution_hash)
+                job_keys[job] = key
+                cached = (
+                    cache.get(key) if cache is not None and not args.refresh else None
+                )
+                if cached is not None:
+                    job_results[job] = cached_phases(cached, part=job.part)
+
+        timings = load_timings(args.timings)
+        job_results.update(
+            run_jobs(
+                [job for job in job_keys if job not in job_results],
+                inputs,
+                max_workers=args.jobs,
+                trace_memory=args.trace_memory,
+                timeout=args.timeout,
+                parse_cache=args.parse_cache,
+                timings=timings,
+            )
+        )
+        save_timings(args.timings, timings)
+
+        if cache is not None:
+            for job, phases in job_results.items():
+                answer = to_cached_answer(phases)
+                if answer is not None and not phases[-1].cached:
+                    cache.put(job_keys[job], answer)
+
+    if args.memory_budget is not None:
+        budget = int(args.memory_budget * 1024 * 1024)
+        job_results = {
+            job: enforce_memory_budget(phases, budget)
+            for job, phases in job_results.items()
+        }
+
+    results = collect_results(job_results)
+    if args.record_answers:
+        record_answers(ANSWERS_PATH, results)
+    if args.json is not None and str(args.json) == "-":
+        print(to_json(results))
+    else:
+        print(format_table(results))
+        if args.json is not None:
+            args.json.write_text(to_json(results) + "\n")
+
+    return 0 if all(result.ok() for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())